@@ -13,10 +13,17 @@ DATA_DIR.mkdir(exist_ok=True)
 # Database
 DATABASE_PATH = DATA_DIR / "tracker.db"
 DATABASE_TIMEOUT = 30.0  # seconds
+DATABASE_FLUSH_INTERVAL = 0.2  # seconds between buffered price writes
+DATABASE_FLUSH_ROWS = 10000  # buffered rows that force an immediate flush
 
 # Binance API
 BINANCE_API_URL = "https://api.binance.com/api/v3"
 API_RATE_LIMIT_DELAY = 0.1  # seconds between API calls
+API_REQUEST_TIMEOUT = 10.0  # seconds before a REST call is abandoned
+BINANCE_WS_URL = "wss://stream.binance.com:9443/ws/!miniTicker@arr"  # all-market price stream
+PRICE_STREAM_ENABLED = True  # needs websocket-client; falls back to REST polling without it
+PRICE_STREAM_MAX_AGE = 5.0  # seconds without a stream message before prices come from REST again
+PRICE_SNAPSHOT_TTL = 1.5  # seconds a REST price snapshot is shared between callers
 
 # Trading pairs
 TARGET_STABLECOINS = ['USDT', 'USDC']
@@ -40,6 +47,7 @@ CONSISTENCY_MAX_DIFF = 5.0  # max % difference between periods for consistency
 
 # Update settings
 UPDATE_INTERVAL = 60  # seconds between price updates
+UPDATE_JITTER = 2.0  # up to this many seconds of random delay per update, so workers don't poll in lockstep
 CLEANUP_INTERVAL = 3600  # seconds between database cleanup
 DATA_RETENTION_DAYS = 7  # days to keep historical data
 
@@ -47,6 +55,8 @@ DATA_RETENTION_DAYS = 7  # days to keep historical data
 WEB_HOST = '127.0.0.1'
 WEB_PORT = 5000
 WEB_DEBUG = False
+WEB_THREADS = 8  # waitress request threads; requests only read the cached snapshot
+GZIP_LEVEL = 4  # compression level for gzip-encoded API and export responses
 
 # Process management
 PID_FILE = DATA_DIR / "tracker.pid"
@@ -61,6 +71,10 @@ LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 MAX_CONCURRENT_REQUESTS = 10  # for API calls
 BATCH_SIZE = 50  # symbols per batch
 CACHE_TTL = 30  # seconds to cache calculations
+BTC_RETURNS_TTL = 60  # seconds Bitcoin's return series is reused by standalone correlation calls
+INDICATOR_CACHE_SIZE = 4096  # (symbol, timeframe) indicator results kept for unchanged klines
+PRICE_BUFFER_MINUTES = 730  # minutes of recent prices kept in memory for growth rates (longest interval + margin)
+INTERVAL_WINDOW_SECONDS = 120  # an interval's price is the newest one at most this long before its target time
 
 # Display settings
 DEFAULT_SORT_COLUMN = '7h'  # sort by 7 hour change by default
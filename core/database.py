@@ -2,37 +2,132 @@
 Database management with proper connection handling and WAL mode
 """
 
+import atexit
+import os
 import sqlite3
 import threading
 import time
 from contextlib import contextmanager
 from datetime import datetime, timedelta
+from pathlib import Path
+from queue import Queue
 from typing import List, Dict, Optional, Tuple
 import logging
 
-from config import DATABASE_PATH, DATABASE_TIMEOUT, DATA_RETENTION_DAYS
+import numpy as np
+
+from config import (
+    DATABASE_PATH, DATABASE_TIMEOUT, DATABASE_FLUSH_INTERVAL, DATABASE_FLUSH_ROWS,
+    DATA_RETENTION_DAYS, INTERVAL_WINDOW_SECONDS
+)
 
 logger = logging.getLogger(__name__)
 
+# DATETIME columns are stored as ISO text. The explicit adapter replaces sqlite3's
+# default one, deprecated in Python 3.12; no query reads them back, so no converter
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(" "))
+
+# Hot-path statements. sqlite3 keeps prepared statements in a per-connection LRU keyed
+# by SQL text, so passing these same strings every call skips parse + prepare.
+_STATEMENT_CACHE_SIZE = 256
+
+_SQL_STORE_PRICES = "INSERT OR REPLACE INTO price_history (symbol, price, timestamp) VALUES (?, ?, ?)"
+
+# Prices only: served from idx_symbol_timestamp_price without touching the table
+_SQL_GET_PRICE_SERIES = """
+    SELECT price 
+    FROM price_history 
+    WHERE symbol = ? AND timestamp >= ?
+    ORDER BY timestamp
+"""
+
+# Formatted with one placeholder per symbol; full batches always produce the same text
+_SQL_GET_PRICE_SERIES_MANY = """
+    SELECT symbol, price 
+    FROM price_history 
+    WHERE symbol IN ({placeholders}) AND timestamp >= ?
+    ORDER BY symbol, timestamp
+"""
+_HISTORIES_BATCH_SIZE = 500  # well under SQLite's bound-parameter limit
+
+# latest_prices holds one row per symbol, kept current by every price flush;
+# a late-arriving older row never overwrites a newer one
+_SQL_UPSERT_LATEST_PRICE = """
+    INSERT INTO latest_prices (symbol, price, ts) VALUES (?, ?, ?)
+    ON CONFLICT(symbol) DO UPDATE SET price = excluded.price, ts = excluded.ts
+    WHERE excluded.ts >= latest_prices.ts
+"""
+
+_SQL_GET_LATEST_PRICES = "SELECT symbol, price FROM latest_prices"
+
+# Newest row at or before the target, at most the window older than it: a single
+# seek on idx_symbol_timestamp_price, same rule as the Postgres backend
+_SQL_GET_PRICE_AT = """
+    SELECT price 
+    FROM price_history 
+    WHERE symbol = ? 
+    AND timestamp BETWEEN ? AND ?
+    ORDER BY timestamp DESC
+    LIMIT 1
+"""
+
+# The same seek for every (symbol, minutes) anchor in one statement; the anchor
+# VALUES lists are filled in per batch
+_SQL_GET_PRICES_AT = """
+    WITH s(symbol) AS (VALUES {symbols}),
+         m(minutes, lo, hi) AS (VALUES {anchors})
+    SELECT s.symbol, m.minutes, (
+        SELECT price 
+        FROM price_history 
+        WHERE symbol = s.symbol 
+        AND timestamp BETWEEN m.lo AND m.hi
+        ORDER BY timestamp DESC
+        LIMIT 1
+    ) AS price
+    FROM s CROSS JOIN m
+"""
+
+_SQL_UPDATE_SYMBOL_INFO = """
+    INSERT OR REPLACE INTO symbol_info 
+    (symbol, base_asset, quote_asset, last_update) 
+    VALUES (?, ?, ?, ?)
+"""
+
 
 class Database:
-    """Thread-safe database manager with connection pooling and retry logic"""
+    """Thread-safe database manager with a reader pool and a single writer connection"""
     
     def __init__(self):
         self.path = DATABASE_PATH
         self.timeout = DATABASE_TIMEOUT
-        self._local = threading.local()
-        self._lock = threading.Lock()
+        
+        # SQLite allows one writer at a time, so all writes share one connection
+        self._writer = self._connect()
+        self._writer_lock = threading.Lock()
         self._init_database()
+        
+        # Under WAL readers never block the writer (or each other)
+        self._readers: Queue = Queue()
+        for _ in range(os.cpu_count() or 1):
+            self._readers.put(self._connect(read_only=True))
+        
+        # Price writes from concurrent fetch workers are buffered and written by one
+        # flusher as a single transaction, instead of queueing on the writer lock
+        self._write_buffer: List[Tuple[str, float, datetime]] = []
+        self._buffer_lock = threading.Lock()
+        self._closed = threading.Event()
+        self._flush_thread = threading.Thread(target=self._flush_loop, name="db-flush", daemon=True)
+        self._flush_thread.start()
+        atexit.register(self.close)
     
     def _init_database(self):
         """Initialize database with WAL mode and create tables"""
-        with self._get_connection() as conn:
-            # Enable WAL mode for better concurrency
-            conn.execute("PRAGMA journal_mode=WAL")
-            conn.execute("PRAGMA synchronous=NORMAL")
-            conn.execute("PRAGMA cache_size=10000")
-            conn.execute("PRAGMA temp_store=MEMORY")
+        with self._write_conn() as conn:
+            # Incremental auto-vacuum lets cleanup hand back free pages without rewriting
+            # the whole file. New databases pick it up directly, existing ones need one VACUUM.
+            if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+                conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+                conn.execute("VACUUM")
             
             # Create tables
             conn.execute("""
@@ -54,131 +149,239 @@ class Database:
                 )
             """)
             
-            # Create indexes
+            # Create indexes; price is included so per-symbol lookups never touch the table
             conn.execute("""
-                CREATE INDEX IF NOT EXISTS idx_symbol_timestamp 
-                ON price_history(symbol, timestamp DESC)
+                CREATE INDEX IF NOT EXISTS idx_symbol_timestamp_price 
+                ON price_history(symbol, timestamp DESC, price)
             """)
+            conn.execute("DROP INDEX IF EXISTS idx_symbol_timestamp")
             
             conn.execute("""
                 CREATE INDEX IF NOT EXISTS idx_timestamp 
                 ON price_history(timestamp DESC)
             """)
             
-            conn.commit()
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS latest_prices (
+                    symbol TEXT PRIMARY KEY,
+                    price REAL NOT NULL,
+                    ts DATETIME NOT NULL
+                )
+            """)
+            
+            # Seed from existing history the first time; afterwards flush() keeps it current.
+            # SQLite takes the bare `price` column from the row holding MAX(timestamp).
+            if conn.execute("SELECT 1 FROM latest_prices LIMIT 1").fetchone() is None:
+                conn.execute("""
+                    INSERT INTO latest_prices (symbol, price, ts)
+                    SELECT symbol, price, MAX(timestamp)
+                    FROM price_history
+                    GROUP BY symbol
+                """)
     
-    @contextmanager
-    def _get_connection(self):
-        """Get a thread-local database connection"""
-        if not hasattr(self._local, 'conn') or self._local.conn is None:
-            self._local.conn = sqlite3.connect(
-                self.path,
-                timeout=self.timeout,
-                isolation_level=None  # autocommit mode
-            )
-            self._local.conn.row_factory = sqlite3.Row
+    def _connect(self, read_only: bool = False) -> sqlite3.Connection:
+        """Open a new connection and apply the per-connection PRAGMAs"""
+        if read_only:
+            target = f"{Path(self.path).resolve().as_uri()}?mode=ro&cache=private"
+        else:
+            target = self.path
         
+        conn = sqlite3.connect(
+            target,
+            timeout=self.timeout,
+            isolation_level=None,  # autocommit mode
+            check_same_thread=False,  # connections are handed between threads
+            uri=read_only,
+            cached_statements=_STATEMENT_CACHE_SIZE
+        )
+        conn.row_factory = sqlite3.Row
+        
+        if not read_only:
+            # WAL lets readers proceed while the writer holds the lock
+            conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        # Wait for locks inside SQLite instead of failing with SQLITE_BUSY
+        conn.execute(f"PRAGMA busy_timeout={int(self.timeout * 1000)}")
+        conn.execute("PRAGMA cache_size=-20000")  # ~20MB page cache
+        conn.execute("PRAGMA temp_store=MEMORY")
+        return conn
+    
+    @contextmanager
+    def _read_conn(self):
+        """Borrow a read-only connection from the pool"""
+        conn = self._readers.get()
         try:
-            yield self._local.conn
-        except sqlite3.OperationalError as e:
-            if "database is locked" in str(e):
-                logger.error("Database locked, retrying...")
-                time.sleep(0.1)
+            yield conn
+        finally:
+            self._readers.put(conn)
+    
+    @contextmanager
+    def _write_conn(self):
+        """Get exclusive use of the writer connection"""
+        with self._writer_lock:
+            try:
+                yield self._writer
+            except sqlite3.OperationalError as e:
+                if "database is locked" in str(e):
+                    logger.error("Database locked, retrying...")
+                    time.sleep(0.1)
                 raise
-            else:
+    
+    @contextmanager
+    def _transaction(self):
+        """Write transaction that grabs the write lock up front"""
+        with self._write_conn() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except Exception:
+                conn.execute("ROLLBACK")
                 raise
+            conn.execute("COMMIT")
     
     def store_prices(self, prices: Dict[str, float]):
-        """Store multiple prices in a single transaction"""
+        """Queue prices for the next flush (at most DATABASE_FLUSH_INTERVAL away)"""
         timestamp = datetime.now()
         data = [(symbol, price, timestamp) for symbol, price in prices.items() if price > 0]
         
-        with self._lock:
-            with self._get_connection() as conn:
-                conn.executemany(
-                    "INSERT OR REPLACE INTO price_history (symbol, price, timestamp) VALUES (?, ?, ?)",
-                    data
-                )
+        with self._buffer_lock:
+            self._write_buffer.extend(data)
+            full = len(self._write_buffer) >= DATABASE_FLUSH_ROWS
+        if full:
+            self.flush()
+    
+    def _take_buffer(self) -> List[Tuple[str, float, datetime]]:
+        with self._buffer_lock:
+            data, self._write_buffer = self._write_buffer, []
+        return data
     
-    def get_price_history(self, symbol: str, hours: float) -> List[Tuple[datetime, float]]:
-        """Get price history for a symbol"""
+    @staticmethod
+    def _write_prices(conn: sqlite3.Connection, data: List[Tuple[str, float, datetime]]):
+        conn.executemany(_SQL_STORE_PRICES, data)
+        conn.executemany(_SQL_UPSERT_LATEST_PRICE, data)
+    
+    def flush(self):
+        """Write all buffered prices in one transaction"""
+        data = self._take_buffer()
+        if not data:
+            return
+        
+        with self._transaction() as conn:
+            self._write_prices(conn, data)
+    
+    def _flush_loop(self):
+        """Background flusher for buffered price writes"""
+        while not self._closed.wait(DATABASE_FLUSH_INTERVAL):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Failed to flush buffered prices: {e}")
+    
+    def get_price_array(self, symbol: str, hours: float) -> np.ndarray:
+        """Prices of a symbol over the last hours, oldest first, as a float64 array"""
         cutoff = datetime.now() - timedelta(hours=hours)
         
-        with self._get_connection() as conn:
-            cursor = conn.execute("""
-                SELECT timestamp, price 
-                FROM price_history 
-                WHERE symbol = ? AND timestamp >= ?
-                ORDER BY timestamp
-            """, (symbol, cutoff))
-            
-            return [(datetime.fromisoformat(row['timestamp']), row['price']) 
-                    for row in cursor.fetchall()]
+        with self._read_conn() as conn:
+            cursor = conn.execute(_SQL_GET_PRICE_SERIES, (symbol, cutoff))
+            return np.fromiter((row[0] for row in cursor), dtype=np.float64)
+    
+    def get_price_arrays(self, symbols: List[str], hours: float) -> Dict[str, np.ndarray]:
+        """get_price_array for many symbols in one query per batch; empty arrays for symbols without rows"""
+        cutoff = datetime.now() - timedelta(hours=hours)
+        series: Dict[str, List[float]] = {symbol: [] for symbol in symbols}
+        symbols = list(series)
+        
+        with self._read_conn() as conn:
+            for start in range(0, len(symbols), _HISTORIES_BATCH_SIZE):
+                batch = symbols[start:start + _HISTORIES_BATCH_SIZE]
+                sql = _SQL_GET_PRICE_SERIES_MANY.format(placeholders=','.join('?' * len(batch)))
+                for row in conn.execute(sql, (*batch, cutoff)):
+                    series[row[0]].append(row[1])
+        
+        return {symbol: np.array(prices, dtype=np.float64) for symbol, prices in series.items()}
     
     def get_latest_prices(self) -> Dict[str, float]:
         """Get the latest price for all symbols"""
-        with self._get_connection() as conn:
-            cursor = conn.execute("""
-                SELECT symbol, price
-                FROM price_history
-                WHERE timestamp IN (
-                    SELECT MAX(timestamp)
-                    FROM price_history
-                    GROUP BY symbol
-                )
-            """)
+        with self._read_conn() as conn:
+            cursor = conn.execute(_SQL_GET_LATEST_PRICES)
             
             return {row['symbol']: row['price'] for row in cursor.fetchall()}
     
     def get_price_at_interval(self, symbol: str, minutes_ago: int) -> Optional[float]:
         """Get price from N minutes ago"""
         target_time = datetime.now() - timedelta(minutes=minutes_ago)
-        window = timedelta(minutes=2)  # 2 minute window
-        
-        with self._get_connection() as conn:
-            cursor = conn.execute("""
-                SELECT price 
-                FROM price_history 
-                WHERE symbol = ? 
-                AND timestamp BETWEEN ? AND ?
-                ORDER BY ABS(julianday(timestamp) - julianday(?))
-                LIMIT 1
-            """, (symbol, target_time - window, target_time + window, target_time))
+        window = timedelta(seconds=INTERVAL_WINDOW_SECONDS)
+        
+        with self._read_conn() as conn:
+            cursor = conn.execute(_SQL_GET_PRICE_AT, (symbol, target_time - window, target_time))
             
             row = cursor.fetchone()
             return row['price'] if row else None
     
+    def get_prices_at_intervals(self, symbols: List[str], minutes_list: List[int]) -> Dict[Tuple[str, int], float]:
+        """Get prices from N minutes ago for every symbol/interval pair; missing pairs are left out"""
+        now = datetime.now()
+        window = timedelta(seconds=INTERVAL_WINDOW_SECONDS)
+        anchors = []
+        for minutes in minutes_list:
+            target_time = now - timedelta(minutes=minutes)
+            anchors.extend((minutes, target_time - window, target_time))
+        
+        prices: Dict[Tuple[str, int], float] = {}
+        symbols = list(dict.fromkeys(symbols))
+        if not symbols or not anchors:
+            return prices
+        
+        anchor_values = ','.join(['(?, ?, ?)'] * len(minutes_list))
+        with self._read_conn() as conn:
+            for start in range(0, len(symbols), _HISTORIES_BATCH_SIZE):
+                batch = symbols[start:start + _HISTORIES_BATCH_SIZE]
+                sql = _SQL_GET_PRICES_AT.format(symbols=','.join(['(?)'] * len(batch)), anchors=anchor_values)
+                for row in conn.execute(sql, (*batch, *anchors)):
+                    if row[2] is not None:
+                        prices[(row[0], row[1])] = row[2]
+        
+        return prices
+    
     def update_symbol_info(self, symbols: List[Dict]):
         """Update symbol information"""
         timestamp = datetime.now()
         data = [(s['symbol'], s['baseAsset'], s['quoteAsset'], timestamp) 
                 for s in symbols]
         
-        with self._lock:
-            with self._get_connection() as conn:
-                conn.executemany("""
-                    INSERT OR REPLACE INTO symbol_info 
-                    (symbol, base_asset, quote_asset, last_update) 
-                    VALUES (?, ?, ?, ?)
-                """, data)
+        with self._transaction() as conn:
+            conn.executemany(_SQL_UPDATE_SYMBOL_INFO, data)
     
     def cleanup_old_data(self):
-        """Remove old price data"""
+        """Remove old price data; pending buffered prices are written in the same transaction"""
         cutoff = datetime.now() - timedelta(days=DATA_RETENTION_DAYS)
+        data = self._take_buffer()
+        
+        with self._transaction() as conn:
+            if data:
+                self._write_prices(conn, data)
+            deleted = conn.execute(
+                "DELETE FROM price_history WHERE timestamp < ?",
+                (cutoff,)
+            ).rowcount
+            # Symbols with no history left drop out of the latest prices as well
+            conn.execute("DELETE FROM latest_prices WHERE ts < ?", (cutoff,))
         
-        with self._lock:
-            with self._get_connection() as conn:
-                deleted = conn.execute(
-                    "DELETE FROM price_history WHERE timestamp < ?",
-                    (cutoff,)
-                ).rowcount
-                
-                if deleted > 0:
-                    conn.execute("VACUUM")
-                    logger.info(f"Cleaned up {deleted} old price records")
+        if deleted > 0:
+            with self._write_conn() as conn:
+                # incremental_vacuum frees one page per step and execute() only steps once;
+                # executescript() runs it to completion (no transaction is open here)
+                conn.executescript("PRAGMA incremental_vacuum(1000);")
+                conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            logger.info(f"Cleaned up {deleted} old price records")
     
     def close(self):
-        """Close the database connection"""
-        if hasattr(self._local, 'conn') and self._local.conn:
-            self._local.conn.close()
-            self._local.conn = None
\ No newline at end of file
+        """Flush buffered writes and close all database connections"""
+        self._closed.set()
+        self._flush_thread.join()
+        self.flush()
+        
+        while not self._readers.empty():
+            self._readers.get_nowait().close()
+        with self._writer_lock:
+            self._writer.close()
@@ -2,15 +2,31 @@
 PostgreSQL database implementation for cloud deployment
 """
 
+import atexit
+import io
 import os
+import threading
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.pool import ThreadedConnectionPool
+from psycopg2.extras import RealDictCursor, execute_values
 from contextlib import contextmanager
 from datetime import datetime, timedelta
 import logging
 
+import numpy as np
+
+from config_cloud import MAX_CONCURRENT_REQUESTS, WEB_THREADS
+
 logger = logging.getLogger(__name__)
 
+# Weekly indicators partitions are named <prefix><monday as YYYYMMDD>
+INDICATOR_PARTITION_PREFIX = "indicators_wk_"
+
+# Threads that can query at once: the tracker's fetch workers (it reads the same
+# MAX_CONCURRENT_REQUESTS from config_cloud), the web request threads, the background
+# updater and the manual refresh worker
+POOL_MAX_CONNECTIONS = MAX_CONCURRENT_REQUESTS + WEB_THREADS + 2
+
 
 class PostgresDatabase:
     """PostgreSQL database handler for cloud deployment"""
@@ -24,20 +40,29 @@ class PostgresDatabase:
         if self.database_url.startswith("postgres://"):
             self.database_url = self.database_url.replace("postgres://", "postgresql://", 1)
         
+        # Keep connections open between calls instead of a new TCP+TLS handshake per query
+        self._pool = ThreadedConnectionPool(1, POOL_MAX_CONNECTIONS, self.database_url)
+        # getconn() raises PoolError when every connection is out; callers wait here instead
+        self._pool_slots = threading.BoundedSemaphore(POOL_MAX_CONNECTIONS)
+        atexit.register(self._pool.closeall)
+        
         self.init_db()
     
     @contextmanager
     def get_conn(self):
-        """Get database connection with context manager"""
-        conn = psycopg2.connect(self.database_url)
-        try:
-            yield conn
-            conn.commit()
-        except Exception as e:
-            conn.rollback()
-            raise e
-        finally:
-            conn.close()
+        """Borrow a pooled database connection with context manager, waiting if all are in use"""
+        with self._pool_slots:
+            conn = self._pool.getconn()
+            try:
+                yield conn
+                conn.commit()
+            except Exception as e:
+                if not conn.closed:
+                    conn.rollback()
+                raise e
+            finally:
+                # Drop connections the server has closed rather than handing them out again
+                self._pool.putconn(conn, close=bool(conn.closed))
     
     def init_db(self):
         """Initialize database tables"""
@@ -63,19 +88,39 @@ class PostgresDatabase:
                     )
                 """)
                 
-                # Indicators table
+                # Indicators table, range-partitioned by week so cleanup drops whole partitions.
+                # Databases created before partitioning keep their plain table (row deletes).
                 cur.execute("""
                     CREATE TABLE IF NOT EXISTS indicators (
-                        id SERIAL PRIMARY KEY,
                         symbol VARCHAR(20) NOT NULL,
                         timeframe VARCHAR(10) NOT NULL,
                         indicators JSONB,
                         composite_score DECIMAL(5, 2),
                         signal VARCHAR(20),
-                        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        UNIQUE(symbol, timeframe, timestamp)
+                        timestamp TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                        PRIMARY KEY (symbol, timeframe, timestamp)
+                    ) PARTITION BY RANGE (timestamp)
+                """)
+                cur.execute("SELECT relkind FROM pg_class WHERE oid = 'indicators'::regclass")
+                self._indicators_partitioned = cur.fetchone()[0] == 'p'
+                if self._indicators_partitioned:
+                    self._ensure_indicator_partitions(cur)
+                
+                # Latest price per symbol, upserted alongside every price insert
+                cur.execute("""
+                    CREATE TABLE IF NOT EXISTS latest_prices (
+                        symbol VARCHAR(20) PRIMARY KEY,
+                        price DECIMAL(20, 8) NOT NULL,
+                        timestamp TIMESTAMP NOT NULL
                     )
                 """)
+                cur.execute("""
+                    INSERT INTO latest_prices (symbol, price, timestamp)
+                    SELECT DISTINCT ON (symbol) symbol, price, timestamp
+                    FROM prices
+                    WHERE NOT EXISTS (SELECT 1 FROM latest_prices)
+                    ORDER BY symbol, timestamp DESC
+                """)
                 
                 # Create indexes
                 cur.execute("CREATE INDEX IF NOT EXISTS idx_prices_symbol_time ON prices(symbol, timestamp DESC)")
@@ -90,11 +135,22 @@ class PostgresDatabase:
         
         with self.get_conn() as conn:
             with conn.cursor() as cur:
-                values = [(symbol, price) for symbol, price in prices_dict.items()]
-                cur.executemany(
-                    "INSERT INTO prices (symbol, price) VALUES (%s, %s)",
-                    values
-                )
+                # Stream all rows in a single COPY instead of parsing INSERT statements
+                buf = io.StringIO(''.join(
+                    f"{symbol},{price}\n" for symbol, price in prices_dict.items()
+                ))
+                cur.copy_expert("COPY prices (symbol, price) FROM STDIN WITH (FORMAT csv)", buf)
+                
+                # Same transaction, so latest_prices never disagrees with prices
+                execute_values(cur, """
+                    INSERT INTO latest_prices (symbol, price, timestamp)
+                    VALUES %s
+                    ON CONFLICT (symbol)
+                    DO UPDATE SET
+                        price = EXCLUDED.price,
+                        timestamp = EXCLUDED.timestamp
+                    WHERE EXCLUDED.timestamp >= latest_prices.timestamp
+                """, list(prices_dict.items()), template="(%s, %s, CURRENT_TIMESTAMP)", page_size=500)
         
         logger.debug(f"Stored {len(prices_dict)} prices")
     
@@ -115,32 +171,72 @@ class PostgresDatabase:
                 result = cur.fetchone()
                 return result[0] if result else None
     
-    def get_price_history(self, symbol, hours=24):
-        """Get price history for a symbol"""
+    def get_prices_at_intervals(self, symbols, minutes_list):
+        """Get prices from N minutes ago for every symbol/interval pair in a single query"""
+        symbols = list(dict.fromkeys(symbols))
+        if not symbols or not minutes_list:
+            return {}
+        
+        with self.get_conn() as conn:
+            with conn.cursor() as cur:
+                # One index seek per (symbol, minutes) anchor, same rule as get_price_at_interval
+                cur.execute("""
+                    SELECT s.symbol, m.minutes, p.price
+                    FROM unnest(%s::text[]) AS s(symbol)
+                    CROSS JOIN unnest(%s::int[]) AS m(minutes)
+                    CROSS JOIN LATERAL (
+                        SELECT price FROM prices
+                        WHERE symbol = s.symbol
+                        AND timestamp <= %s::timestamp - make_interval(mins => m.minutes)
+                        ORDER BY timestamp DESC
+                        LIMIT 1
+                    ) p
+                """, (symbols, list(minutes_list), datetime.now()))
+                
+                return {(symbol, minutes): float(price) for symbol, minutes, price in cur}
+    
+    def get_price_array(self, symbol, hours=24):
+        """Prices of a symbol over the last hours, oldest first, as a float64 array"""
         since = datetime.now() - timedelta(hours=hours)
         
         with self.get_conn() as conn:
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            with conn.cursor() as cur:
                 cur.execute("""
-                    SELECT timestamp, price
+                    SELECT price::float8
                     FROM prices
                     WHERE symbol = %s AND timestamp >= %s
                     ORDER BY timestamp ASC
                 """, (symbol, since))
                 
-                results = cur.fetchall()
-                return [(row['timestamp'], row['price']) for row in results]
+                return np.fromiter((row[0] for row in cur), dtype=np.float64)
+    
+    def get_price_arrays(self, symbols, hours=24):
+        """get_price_array for many symbols in a single query; empty arrays for symbols without rows"""
+        since = datetime.now() - timedelta(hours=hours)
+        series = {symbol: [] for symbol in symbols}
+        
+        with self.get_conn() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    SELECT symbol, price::float8
+                    FROM prices
+                    WHERE symbol = ANY(%s) AND timestamp >= %s
+                    ORDER BY symbol, timestamp ASC
+                """, (list(series), since))
+                
+                for symbol, price in cur:
+                    series[symbol].append(price)
+        
+        return {symbol: np.array(prices, dtype=np.float64) for symbol, prices in series.items()}
     
     def get_latest_prices(self):
         """Get latest price for each symbol"""
         with self.get_conn() as conn:
             with conn.cursor(cursor_factory=RealDictCursor) as cur:
                 cur.execute("""
-                    SELECT DISTINCT ON (symbol) 
-                        symbol, price, timestamp
-                    FROM prices
+                    SELECT symbol, price
+                    FROM latest_prices
                     WHERE timestamp > CURRENT_TIMESTAMP - INTERVAL '1 hour'
-                    ORDER BY symbol, timestamp DESC
                 """)
                 
                 results = cur.fetchall()
@@ -153,37 +249,72 @@ class PostgresDatabase:
         
         with self.get_conn() as conn:
             with conn.cursor() as cur:
-                for info in symbol_info_list:
-                    cur.execute("""
-                        INSERT INTO symbol_info (symbol, base_asset, quote_asset)
-                        VALUES (%s, %s, %s)
-                        ON CONFLICT (symbol) 
-                        DO UPDATE SET 
-                            base_asset = EXCLUDED.base_asset,
-                            quote_asset = EXCLUDED.quote_asset,
-                            last_updated = CURRENT_TIMESTAMP
-                    """, (info['symbol'], info['baseAsset'], info['quoteAsset']))
+                rows = [(info['symbol'], info['baseAsset'], info['quoteAsset'])
+                        for info in symbol_info_list]
+                execute_values(cur, """
+                    INSERT INTO symbol_info (symbol, base_asset, quote_asset)
+                    VALUES %s
+                    ON CONFLICT (symbol) 
+                    DO UPDATE SET 
+                        base_asset = EXCLUDED.base_asset,
+                        quote_asset = EXCLUDED.quote_asset,
+                        last_updated = CURRENT_TIMESTAMP
+                """, rows, page_size=500)
+    
+    def _ensure_indicator_partitions(self, cur):
+        """
+        Create the indicators partitions for the current and next week (server clock), plus a
+        DEFAULT partition so an insert outside them never fails with "no partition found"
+        """
+        cur.execute("CREATE TABLE IF NOT EXISTS indicators_default PARTITION OF indicators DEFAULT")
+        cur.execute("SELECT date_trunc('week', LOCALTIMESTAMP)")
+        this_week = cur.fetchone()[0]
+        
+        for week_start in (this_week, this_week + timedelta(weeks=1)):
+            week_end = week_start + timedelta(weeks=1)
+            cur.execute(f"""
+                CREATE TABLE IF NOT EXISTS {INDICATOR_PARTITION_PREFIX}{week_start:%Y%m%d}
+                PARTITION OF indicators
+                FOR VALUES FROM (%s) TO (%s)
+            """, (week_start, week_end))
     
-    def store_indicators(self, symbol, timeframe, indicators, composite_result):
-        """Store calculated indicators and signals"""
+    def store_indicators(self, results):
+        """
+        Store calculated indicators and signals for a batch of (symbol, timeframe, indicators, ScoreResult)
+        Nothing calls this yet (nor did the per-row version before it): SQLite has no indicators
+        table, so the tracker doesn't persist indicators. It is kept as the write side of the
+        Postgres indicators table for when it does.
+        """
+        # One row per (symbol, timeframe): the whole batch shares the transaction timestamp
+        rows = {
+            (symbol, timeframe): (
+                symbol,
+                timeframe,
+                psycopg2.extras.Json(indicators),
+                round(composite_result.composite, 2),
+                composite_result.signal
+            )
+            for symbol, timeframe, indicators, composite_result in results
+        }
+        if not rows:
+            return
+        
         with self.get_conn() as conn:
             with conn.cursor() as cur:
-                cur.execute("""
+                # Writers other than the web updater may run longer than a week between
+                # cleanups, so make sure this week's partition exists before inserting
+                if self._indicators_partitioned:
+                    self._ensure_indicator_partitions(cur)
+                execute_values(cur, """
                     INSERT INTO indicators 
                     (symbol, timeframe, indicators, composite_score, signal)
-                    VALUES (%s, %s, %s::jsonb, %s, %s)
+                    VALUES %s
                     ON CONFLICT (symbol, timeframe, timestamp) 
                     DO UPDATE SET
                         indicators = EXCLUDED.indicators,
                         composite_score = EXCLUDED.composite_score,
                         signal = EXCLUDED.signal
-                """, (
-                    symbol,
-                    timeframe,
-                    psycopg2.extras.Json(indicators),
-                    composite_result.get('composite_score'),
-                    composite_result.get('signal')
-                ))
+                """, list(rows.values()), template="(%s, %s, %s::jsonb, %s, %s)", page_size=500)
     
     def cleanup_old_data(self, days_to_keep=7):
         """Remove old data to save space"""
@@ -194,11 +325,48 @@ class PostgresDatabase:
                 # Clean prices
                 cur.execute("DELETE FROM prices WHERE timestamp < %s", (cutoff,))
                 deleted_prices = cur.rowcount
+                cur.execute("DELETE FROM latest_prices WHERE timestamp < %s", (cutoff,))
                 
                 # Clean indicators
-                cur.execute("DELETE FROM indicators WHERE timestamp < %s", (cutoff,))
-                deleted_indicators = cur.rowcount
+                if self._indicators_partitioned:
+                    # Drop weeks that ended before the cutoff and roll the next week in
+                    dropped, dropped_rows = self._drop_indicator_partitions(cur, cutoff)
+                    self._ensure_indicator_partitions(cur)
+                    # Rows that fell through to the DEFAULT partition are deleted row by row
+                    cur.execute("DELETE FROM indicators_default WHERE timestamp < %s", (cutoff,))
+                    deleted_indicators = dropped_rows + cur.rowcount
+                    indicators_msg = (f"{deleted_indicators} indicator records "
+                                      f"({dropped} dropped partitions, {cur.rowcount} default-partition rows)")
+                else:
+                    cur.execute("DELETE FROM indicators WHERE timestamp < %s", (cutoff,))
+                    deleted_indicators = cur.rowcount
+                    indicators_msg = f"{deleted_indicators} indicator records"
                 
-        logger.info(f"Cleaned up {deleted_prices} price records and {deleted_indicators} indicator records")
+        logger.info(f"Cleaned up {deleted_prices} price records and {indicators_msg}")
+        
+        return deleted_prices + deleted_indicators
+    
+    def _drop_indicator_partitions(self, cur, cutoff):
+        """
+        Drop weekly indicators partitions that lie entirely before cutoff
+        Returns (partitions dropped, rows they held)
+        """
+        cur.execute("""
+            SELECT c.relname
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = 'indicators'::regclass
+        """)
+        
+        dropped = dropped_rows = 0
+        for (name,) in cur.fetchall():
+            if not name.startswith(INDICATOR_PARTITION_PREFIX):
+                continue
+            week_start = datetime.strptime(name[len(INDICATOR_PARTITION_PREFIX):], '%Y%m%d')
+            if week_start + timedelta(weeks=1) <= cutoff:
+                cur.execute(f"SELECT count(*) FROM {name}")
+                dropped_rows += cur.fetchone()[0]
+                cur.execute(f"DROP TABLE IF EXISTS {name}")
+                dropped += 1
         
-        return deleted_prices + deleted_indicators
\ No newline at end of file
+        return dropped, dropped_rows
\ No newline at end of file
@@ -0,0 +1,256 @@
+"""
+Numba-compiled kernels for the technical indicators used by IndicatorManager
+
+Each kernel is a single O(N) pass over a contiguous NumPy array and reproduces the
+NaN handling of the pandas expression it replaces (rolling windows need a full
+window of valid values, EMAs follow ewm(adjust=False)).
+
+TA-Lib is deliberately not used for the standard indicators: its RSI uses Wilder
+smoothing and BBANDS a population std, while the profitable-strategy features were
+derived from simple rolling means and sample std, so values would shift.
+"""
+
+import numpy as np
+from numba import njit
+
+
+# Streaming update steps shared by the single-series kernels and fused_close()
+
+@njit(cache=True)
+def _window_sum(x, i, window, total, nobs):
+    """Slide a (sum, count) window forward to end at index i"""
+    value = x[i]
+    if value == value:
+        total += value
+        nobs += 1
+    if i >= window:
+        old = x[i - window]
+        if old == old:
+            total -= old
+            nobs -= 1
+    return total, nobs
+
+
+@njit(cache=True)
+def _welford_add(nobs, mean, m2, value):
+    if value == value:
+        nobs += 1
+        delta = value - mean
+        mean += delta / nobs
+        m2 += delta * (value - mean)
+    return nobs, mean, m2
+
+
+@njit(cache=True)
+def _welford_remove(nobs, mean, m2, value):
+    if value == value:
+        nobs -= 1
+        if nobs == 0:
+            return 0, 0.0, 0.0
+        delta = value - mean
+        mean -= delta / nobs
+        m2 -= delta * (value - mean)
+    return nobs, mean, m2
+
+
+@njit(cache=True)
+def _sample_std(nobs, m2):
+    return np.sqrt(m2 / (nobs - 1)) if m2 > 0.0 else 0.0
+
+
+@njit(cache=True)
+def _ema_update(weighted, old_wt, value, alpha):
+    """One ewm(adjust=False) step; start from weighted=NaN, old_wt=1.0"""
+    if weighted == weighted:
+        old_wt *= 1.0 - alpha
+        if value == value:
+            if weighted != value:
+                weighted = (old_wt * weighted + alpha * value) / (old_wt + alpha)
+            old_wt = 1.0
+    elif value == value:
+        weighted = value
+    return weighted, old_wt
+
+
+# Single-series kernels
+
+@njit(cache=True)
+def roll_mean(x, window):
+    """Rolling mean, equivalent to Series.rolling(window).mean()"""
+    n = x.shape[0]
+    out = np.full(n, np.nan)
+    total = 0.0
+    nobs = 0
+    for i in range(n):
+        total, nobs = _window_sum(x, i, window, total, nobs)
+        if i >= window - 1 and nobs >= window:
+            out[i] = total / nobs
+    return out
+
+
+@njit(cache=True)
+def roll_std(x, window):
+    """Rolling sample std (ddof=1) via add/remove Welford updates"""
+    n = x.shape[0]
+    out = np.full(n, np.nan)
+    nobs = 0
+    mean = 0.0
+    m2 = 0.0
+    for i in range(n):
+        nobs, mean, m2 = _welford_add(nobs, mean, m2, x[i])
+        if i >= window:
+            nobs, mean, m2 = _welford_remove(nobs, mean, m2, x[i - window])
+        if i >= window - 1 and nobs >= window:
+            out[i] = _sample_std(nobs, m2)
+    return out
+
+
+@njit(cache=True)
+def ema(x, span):
+    """Exponential moving average, equivalent to Series.ewm(span, adjust=False).mean()"""
+    n = x.shape[0]
+    out = np.full(n, np.nan)
+    alpha = 2.0 / (span + 1.0)
+    weighted = np.nan
+    old_wt = 1.0
+    for i in range(n):
+        weighted, old_wt = _ema_update(weighted, old_wt, x[i], alpha)
+        out[i] = weighted
+    return out
+
+
+@njit(cache=True)
+def atr(high, low, close, window):
+    """Average true range (simple rolling mean of the true range)"""
+    n = close.shape[0]
+    true_range = np.empty(n)
+    for i in range(n):
+        tr = high[i] - low[i]
+        if i > 0:
+            prev_close = close[i - 1]
+            # NaN comparisons are False, so missing terms are skipped like DataFrame.max()
+            high_close = abs(high[i] - prev_close)
+            low_close = abs(low[i] - prev_close)
+            if high_close > tr or tr != tr:
+                tr = high_close
+            if low_close > tr or tr != tr:
+                tr = low_close
+        true_range[i] = tr
+    return roll_mean(true_range, window)
+
+
+@njit(cache=True)
+def rsi(close, window):
+    """RSI from simple rolling means of gains and losses"""
+    n = close.shape[0]
+    gains = np.zeros(n)
+    losses = np.zeros(n)
+    for i in range(1, n):
+        delta = close[i] - close[i - 1]
+        if delta > 0:
+            gains[i] = delta
+        elif delta < 0:
+            losses[i] = -delta
+    avg_gain = roll_mean(gains, window)
+    avg_loss = roll_mean(losses, window)
+    out = np.full(n, np.nan)
+    for i in range(n):
+        gain = avg_gain[i]
+        loss = avg_loss[i]
+        if gain != gain or loss != loss:
+            continue
+        if loss > 0.0:
+            out[i] = 100.0 - 100.0 / (1.0 + gain / loss)
+        elif gain > 0.0:
+            out[i] = 100.0  # rs -> inf
+    return out
+
+
+@njit(cache=True)
+def roll_rank_pct(x, window):
+    """
+    Percent of each window strictly below its newest value (rolling percentile rank)
+    Rescans each window, O(N*W), which for W=50 is cheaper than maintaining a sorted window
+    """
+    n = x.shape[0]
+    out = np.full(n, np.nan)
+    nobs = 0
+    for i in range(n):
+        if x[i] == x[i]:
+            nobs += 1
+        if i >= window:
+            old = x[i - window]
+            if old == old:
+                nobs -= 1
+        if i >= window - 1 and nobs >= window:
+            last = x[i]
+            below = 0
+            for j in range(i - window + 1, i + 1):
+                if x[j] < last:
+                    below += 1
+            out[i] = below / window * 100.0
+    return out
+
+
+# Fused kernel
+
+@njit(cache=True)
+def fused_close(close):
+    """
+    Every close-derived series in one sweep over close[]:
+    (sma_7, sma_20, std_20, sma_25, macd, macd_signal)
+    """
+    n = close.shape[0]
+    sma_7 = np.full(n, np.nan)
+    sma_20 = np.full(n, np.nan)
+    std_20 = np.full(n, np.nan)
+    sma_25 = np.full(n, np.nan)
+    macd = np.empty(n)
+    macd_signal = np.empty(n)
+
+    sum_7, nobs_7 = 0.0, 0
+    sum_25, nobs_25 = 0.0, 0
+    nobs_20, mean_20, m2_20 = 0, 0.0, 0.0
+    ema_12, wt_12 = np.nan, 1.0
+    ema_26, wt_26 = np.nan, 1.0
+    ema_9, wt_9 = np.nan, 1.0
+
+    for i in range(n):
+        value = close[i]
+
+        sum_7, nobs_7 = _window_sum(close, i, 7, sum_7, nobs_7)
+        if i >= 6 and nobs_7 >= 7:
+            sma_7[i] = sum_7 / nobs_7
+
+        sum_25, nobs_25 = _window_sum(close, i, 25, sum_25, nobs_25)
+        if i >= 24 and nobs_25 >= 25:
+            sma_25[i] = sum_25 / nobs_25
+
+        nobs_20, mean_20, m2_20 = _welford_add(nobs_20, mean_20, m2_20, value)
+        if i >= 20:
+            nobs_20, mean_20, m2_20 = _welford_remove(nobs_20, mean_20, m2_20, close[i - 20])
+        if i >= 19 and nobs_20 >= 20:
+            sma_20[i] = mean_20
+            std_20[i] = _sample_std(nobs_20, m2_20)
+
+        ema_12, wt_12 = _ema_update(ema_12, wt_12, value, 2.0 / 13.0)
+        ema_26, wt_26 = _ema_update(ema_26, wt_26, value, 2.0 / 27.0)
+        macd[i] = ema_12 - ema_26
+        ema_9, wt_9 = _ema_update(ema_9, wt_9, macd[i], 2.0 / 10.0)
+        macd_signal[i] = ema_9
+
+    return sma_7, sma_20, std_20, sma_25, macd, macd_signal
+
+
+# Compile (or load from the on-disk cache) every signature IndicatorManager uses at import,
+# rather than on the first symbol of a refresh: float32 kline columns, float64 returns/MACD
+for _dtype in (np.float32, np.float64):
+    _x = np.ones(2, dtype=_dtype)
+    roll_mean(_x, 1)
+    roll_std(_x, 1)
+    ema(_x, 1)
+    atr(_x, _x, _x, 1)
+    rsi(_x, 1)
+    roll_rank_pct(_x, 1)
+    fused_close(_x)
+del _dtype, _x
@@ -2,12 +2,15 @@
 Indicator Manager for V2 - Calculate technical indicators based on profitable symbols' top features
 """
 
+import re
 import pandas as pd
 import numpy as np
-from typing import List, Dict, Tuple, Optional
+from typing import Callable, List, Dict, Tuple, Optional
 import logging
 from pathlib import Path
 
+from core import indicator_kernels as kernels
+
 logger = logging.getLogger(__name__)
 
 # Universal features for symbols without proven patterns (based on frequency in profitable strategies)
@@ -22,11 +25,154 @@ UNIVERSAL_FEATURES = [
 ]
 
 
+# Intermediate arrays (columns, rolling windows, EMAs) are memoized in a per-call cache
+# dict so correlated features such as bb_width/bb_position share one kernel pass.
+# Kernel inputs are float32: kline prices/volumes carry far fewer than 7 significant
+# digits, and the kernels keep their running sums/EMAs and outputs in float64.
+# Raw columns divided directly (high/low, close/open, price over its mean) stay float64:
+# the scoring rules have hard band edges such as 1.05, which prices like 1.05/1.00 hit
+# exactly and which float32 rounds across.
+def _values(df: pd.DataFrame, cache: Dict, column: str) -> np.ndarray:
+    """Column as a contiguous float32 kernel input, extracted once per call"""
+    if column not in cache:
+        cache[column] = np.ascontiguousarray(df[column].to_numpy(dtype=np.float32))
+    return cache[column]
+
+
+def _values64(df: pd.DataFrame, cache: Dict, column: str) -> np.ndarray:
+    """Column as a float64 array, for ratios and differences computed outside the kernels"""
+    key = ('f64', column)
+    if key not in cache:
+        cache[key] = df[column].to_numpy(dtype=np.float64)
+    return cache[key]
+
+
+def _rolling_mean(df: pd.DataFrame, cache: Dict, column: str, window: int) -> np.ndarray:
+    key = ('mean', column, window)
+    if key not in cache:
+        cache[key] = kernels.roll_mean(_values(df, cache, column), window)
+    return cache[key]
+
+
+def _rolling_std(df: pd.DataFrame, cache: Dict, column: str, window: int) -> np.ndarray:
+    key = ('std', column, window)
+    if key not in cache:
+        cache[key] = kernels.roll_std(_values(df, cache, column), window)
+    return cache[key]
+
+
+def _macd(df: pd.DataFrame, cache: Dict) -> Tuple[np.ndarray, np.ndarray]:
+    """MACD line and its 9-period signal line"""
+    if 'macd' not in cache:
+        close = _values(df, cache, 'close')
+        macd = kernels.ema(close, 12) - kernels.ema(close, 26)
+        cache['macd'] = (macd, kernels.ema(macd, 9))
+    return cache['macd']
+
+
+def _bollinger(df: pd.DataFrame, cache: Dict) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """20-period Bollinger Bands: (sma, upper, lower)"""
+    if 'bollinger' not in cache:
+        sma_20 = _rolling_mean(df, cache, 'close', 20)
+        std_20 = _rolling_std(df, cache, 'close', 20)
+        cache['bollinger'] = (sma_20, sma_20 + (2 * std_20), sma_20 - (2 * std_20))
+    return cache['bollinger']
+
+
+# Features derived from close[] that fused_close() serves in a single sweep
+_FUSED_CLOSE_FEATURES = frozenset({
+    'macd', 'macd_signal', 'macd_hist', 'bb_width', 'bb_position',
+    'price_sma7_ratio', 'price_sma25_ratio', 'sma7_sma25_ratio'
+})
+
+
+def _fuse_close_features(df: pd.DataFrame, cache: Dict):
+    """Run the fused close[] kernel once and seed the cache with its series"""
+    sma_7, sma_20, std_20, sma_25, macd, macd_signal = kernels.fused_close(_values(df, cache, 'close'))
+    cache[('mean', 'close', 7)] = sma_7
+    cache[('mean', 'close', 20)] = sma_20
+    cache[('std', 'close', 20)] = std_20
+    cache[('mean', 'close', 25)] = sma_25
+    cache['macd'] = (macd, macd_signal)
+
+
+def _atr_ratio(df: pd.DataFrame, cache: Dict) -> np.ndarray:
+    atr = kernels.atr(_values(df, cache, 'high'), _values(df, cache, 'low'), _values(df, cache, 'close'), 14)
+    return atr / _values64(df, cache, 'close')
+
+
+def _rsi(df: pd.DataFrame, cache: Dict, window: int) -> np.ndarray:
+    return kernels.rsi(_values(df, cache, 'close'), window)
+
+
+def _bb_width(df: pd.DataFrame, cache: Dict) -> np.ndarray:
+    sma_20, upper_band, lower_band = _bollinger(df, cache)
+    return (upper_band - lower_band) / sma_20
+
+
+def _bb_position(df: pd.DataFrame, cache: Dict) -> np.ndarray:
+    _, upper_band, lower_band = _bollinger(df, cache)
+    return (_values64(df, cache, 'close') - lower_band) / (upper_band - lower_band)
+
+
+def _ratio_to_mean(df: pd.DataFrame, cache: Dict, column: str, window: int) -> np.ndarray:
+    return _values64(df, cache, column) / _rolling_mean(df, cache, column, window)
+
+
+def _vol_percentile(df: pd.DataFrame, cache: Dict) -> np.ndarray:
+    return kernels.roll_rank_pct(_values(df, cache, 'volume'), 50)
+
+
+# Feature name -> fn(df, cache) returning the feature values
+FEATURE_FNS: Dict[str, Callable[[pd.DataFrame, Dict], np.ndarray]] = {
+    'atr_ratio': _atr_ratio,
+    'returns_std_50': lambda df, cache: _rolling_std(df, cache, 'returns', 50),
+    'returns_std_20': lambda df, cache: _rolling_std(df, cache, 'returns', 20),
+    'returns_std_10': lambda df, cache: _rolling_std(df, cache, 'returns', 10),
+    'returns_mean_50': lambda df, cache: _rolling_mean(df, cache, 'returns', 50),
+    'returns_mean_20': lambda df, cache: _rolling_mean(df, cache, 'returns', 20),
+    'returns_mean_10': lambda df, cache: _rolling_mean(df, cache, 'returns', 10),
+    'volume_mean_50': lambda df, cache: _rolling_mean(df, cache, 'volume', 50),
+    'volume_mean_20': lambda df, cache: _rolling_mean(df, cache, 'volume', 20),
+    'volume_mean_10': lambda df, cache: _rolling_mean(df, cache, 'volume', 10),
+    'volume_std_50': lambda df, cache: _rolling_std(df, cache, 'volume', 50),
+    'volume_std_20': lambda df, cache: _rolling_std(df, cache, 'volume', 20),
+    'volume_std_10': lambda df, cache: _rolling_std(df, cache, 'volume', 10),
+    'macd': lambda df, cache: _macd(df, cache)[0],
+    'macd_signal': lambda df, cache: _macd(df, cache)[1],
+    'macd_hist': lambda df, cache: _macd(df, cache)[0] - _macd(df, cache)[1],
+    'rsi': lambda df, cache: _rsi(df, cache, 14),
+    'rsi_7': lambda df, cache: _rsi(df, cache, 7),
+    'bb_width': _bb_width,
+    'bb_position': _bb_position,
+    'price_sma7_ratio': lambda df, cache: _ratio_to_mean(df, cache, 'close', 7),
+    'price_sma25_ratio': lambda df, cache: _ratio_to_mean(df, cache, 'close', 25),
+    'sma7_sma25_ratio': lambda df, cache: (_rolling_mean(df, cache, 'close', 7) /
+                                           _rolling_mean(df, cache, 'close', 25)),
+    'trade_intensity': lambda df, cache: _ratio_to_mean(df, cache, 'trades', 20),
+    'vol_percentile': _vol_percentile,
+}
+
+# Lag features, e.g. rsi_lag3 -> rsi shifted by 3 bars
+_LAG_RE = re.compile(r'^(?P<base>.+)_lag(?P<periods>\d+)$')
+
+
+def _base_feature(feature: str) -> str:
+    """Strip any _lagN suffixes, e.g. macd_signal_lag5 -> macd_signal"""
+    lag = _LAG_RE.match(feature)
+    while lag:
+        feature = lag.group('base')
+        lag = _LAG_RE.match(feature)
+    return feature
+
+
 class IndicatorManager:
     """Manages technical indicator calculation based on profitable symbols analysis"""
     
     def __init__(self, profitable_symbols_path: str = None):
-        self.profitable_symbols = {}
+        # (symbol, timeframe) -> config, plus the features of each symbol's best config
+        self.profitable_symbols: Dict[Tuple[str, str], Dict] = {}
+        self._best_per_symbol: Dict[str, List[str]] = {}
         self.universal_features = UNIVERSAL_FEATURES
         
         if profitable_symbols_path:
@@ -38,24 +184,40 @@ class IndicatorManager:
             df = pd.read_csv(csv_path)
             
             # Filter for profitable symbols (positive profitability score)
-            profitable_df = df[df['profitability_score'] > 0].copy()
+            df = df[df['profitability_score'] > 0]
             
-            for _, row in profitable_df.iterrows():
-                key = f"{row['symbol']}_{row['timeframe']}"
-                # Handle case where top_features might be NaN or float
-                top_features = row['top_features']
-                if pd.isna(top_features) or not isinstance(top_features, str):
-                    continue
-                features = [f.strip() for f in top_features.split(',')]
-                
-                self.profitable_symbols[key] = {
-                    'symbol': row['symbol'],
-                    'timeframe': row['timeframe'],
+            # Handle case where top_features might be NaN or float
+            df = df[df['top_features'].map(lambda value: isinstance(value, str))]
+            feature_lists = (df['top_features']
+                             .str.replace(r'\s*,\s*', ',', regex=True)
+                             .str.strip()
+                             .str.split(','))
+            
+            def numeric(column: str) -> List[float]:
+                return df[column].fillna(0.0).to_numpy(dtype=np.float64).tolist()
+            
+            self.profitable_symbols = {
+                (symbol, timeframe): {
+                    'symbol': symbol,
+                    'timeframe': timeframe,
                     'features': features,
-                    'win_rate': float(row['win_rate']) if pd.notna(row['win_rate']) else 0.0,
-                    'sharpe_ratio': float(row['sharpe_ratio']) if pd.notna(row['sharpe_ratio']) else 0.0,
-                    'profitability_score': float(row['profitability_score']) if pd.notna(row['profitability_score']) else 0.0
+                    'win_rate': win_rate,
+                    'sharpe_ratio': sharpe_ratio,
+                    'profitability_score': profitability_score
                 }
+                for symbol, timeframe, features, win_rate, sharpe_ratio, profitability_score in zip(
+                    df['symbol'], df['timeframe'], feature_lists,
+                    numeric('win_rate'), numeric('sharpe_ratio'), numeric('profitability_score')
+                )
+            }
+            
+            # Precompute the most profitable configuration per symbol (first one wins ties)
+            best_scores = {}
+            for config in self.profitable_symbols.values():
+                symbol = config['symbol']
+                if symbol not in best_scores or config['profitability_score'] > best_scores[symbol]:
+                    best_scores[symbol] = config['profitability_score']
+                    self._best_per_symbol[symbol] = config['features']
             
             logger.info(f"Loaded {len(self.profitable_symbols)} profitable symbol configurations")
             
@@ -64,21 +226,13 @@ class IndicatorManager:
     
     def get_features_for_symbol(self, symbol: str, timeframe: str) -> List[str]:
         """Get the optimal features for a symbol-timeframe pair"""
-        key = f"{symbol}_{timeframe}"
-        
-        if key in self.profitable_symbols:
-            return self.profitable_symbols[key]['features']
+        config = self.profitable_symbols.get((symbol, timeframe))
+        if config is not None:
+            return config['features']
         
-        # Check if symbol exists with different timeframes
-        symbol_configs = [k for k in self.profitable_symbols.keys() if k.startswith(f"{symbol}_")]
-        if symbol_configs:
-            # Use features from the most profitable configuration
-            best_config = max(symbol_configs, 
-                            key=lambda k: self.profitable_symbols[k]['profitability_score'])
-            return self.profitable_symbols[best_config]['features']
-        
-        # Return universal features for unknown symbols
-        return self.universal_features
+        # Symbol known with different timeframes: use its most profitable configuration,
+        # otherwise universal features for unknown symbols
+        return self._best_per_symbol.get(symbol, self.universal_features)
     
     def calculate_indicators(self, df: pd.DataFrame, symbol: str, timeframe: str) -> pd.DataFrame:
         """Calculate technical indicators based on symbol's optimal features"""
@@ -88,173 +242,64 @@ class IndicatorManager:
         # Get features for this symbol
         features = self.get_features_for_symbol(symbol, timeframe)
         
-        # Calculate all base metrics that might be needed
-        df = self._calculate_base_metrics(df)
+        # Intermediate arrays shared by the base metrics and every requested feature
+        cache = {}
         
-        # Calculate only the required features
-        for feature in features:
-            if feature not in df.columns:
-                df = self._calculate_feature(df, feature)
+        # Divisions by a zero window (e.g. flat volume) yield inf/NaN like pandas does
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # Calculate all base metrics that might be needed
+            df = self._calculate_base_metrics(df, cache)
+            
+            # One pass over close[] for all close-derived features instead of one per feature
+            if any(_base_feature(f) in _FUSED_CLOSE_FEATURES for f in features):
+                _fuse_close_features(df, cache)
+            
+            # Calculate only the required features
+            for feature in features:
+                if feature not in df.columns:
+                    df = self._calculate_feature(df, feature, cache)
         
         return df
     
-    def _calculate_base_metrics(self, df: pd.DataFrame) -> pd.DataFrame:
+    def _calculate_base_metrics(self, df: pd.DataFrame, cache: Optional[Dict] = None) -> pd.DataFrame:
         """Calculate base metrics that other features depend on"""
-        # Returns
-        df['returns'] = df['close'].pct_change()
+        if cache is None:
+            cache = {}
+        close = _values64(df, cache, 'close')
+        
+        # Returns (float64: small differences of nearly equal prices)
+        returns = np.full(close.shape[0], np.nan)
+        returns[1:] = close[1:] / close[:-1] - 1
+        df['returns'] = cache['returns'] = returns
         
         # High-Low ratio
-        df['high_low_ratio'] = df['high'] / df['low']
+        df['high_low_ratio'] = _values64(df, cache, 'high') / _values64(df, cache, 'low')
         
         # Close-Open ratio
-        df['close_open_ratio'] = df['close'] / df['open']
+        df['close_open_ratio'] = close / _values64(df, cache, 'open')
         
         # Volume ratio
-        df['volume_ratio'] = df['volume'] / df['volume'].rolling(window=20).mean()
+        df['volume_ratio'] = _ratio_to_mean(df, cache, 'volume', 20)
         
         return df
     
-    def _calculate_feature(self, df: pd.DataFrame, feature: str) -> pd.DataFrame:
+    def _calculate_feature(self, df: pd.DataFrame, feature: str, cache: Optional[Dict] = None) -> pd.DataFrame:
         """Calculate a specific feature"""
+        if cache is None:
+            cache = {}
+        
         try:
-            if feature == 'atr_ratio':
-                # ATR calculation
-                high_low = df['high'] - df['low']
-                high_close = abs(df['high'] - df['close'].shift(1))
-                low_close = abs(df['low'] - df['close'].shift(1))
-                
-                true_range = pd.concat([high_low, high_close, low_close], axis=1).max(axis=1)
-                atr = true_range.rolling(window=14).mean()
-                df['atr_ratio'] = atr / df['close']
-                
-            elif feature == 'returns_std_50':
-                df['returns_std_50'] = df['returns'].rolling(window=50).std()
-                
-            elif feature == 'returns_std_20':
-                df['returns_std_20'] = df['returns'].rolling(window=20).std()
-                
-            elif feature == 'returns_std_10':
-                df['returns_std_10'] = df['returns'].rolling(window=10).std()
-                
-            elif feature == 'returns_mean_50':
-                df['returns_mean_50'] = df['returns'].rolling(window=50).mean()
-                
-            elif feature == 'returns_mean_20':
-                df['returns_mean_20'] = df['returns'].rolling(window=20).mean()
-                
-            elif feature == 'returns_mean_10':
-                df['returns_mean_10'] = df['returns'].rolling(window=10).mean()
-                
-            elif feature == 'volume_mean_50':
-                df['volume_mean_50'] = df['volume'].rolling(window=50).mean()
-                
-            elif feature == 'volume_mean_20':
-                df['volume_mean_20'] = df['volume'].rolling(window=20).mean()
-                
-            elif feature == 'volume_mean_10':
-                df['volume_mean_10'] = df['volume'].rolling(window=10).mean()
-                
-            elif feature == 'volume_std_50':
-                df['volume_std_50'] = df['volume'].rolling(window=50).std()
-                
-            elif feature == 'volume_std_20':
-                df['volume_std_20'] = df['volume'].rolling(window=20).std()
-                
-            elif feature == 'volume_std_10':
-                df['volume_std_10'] = df['volume'].rolling(window=10).std()
-                
-            elif feature == 'macd_signal':
-                # MACD calculation
-                ema_12 = df['close'].ewm(span=12, adjust=False).mean()
-                ema_26 = df['close'].ewm(span=26, adjust=False).mean()
-                macd = ema_12 - ema_26
-                df['macd'] = macd
-                df['macd_signal'] = macd.ewm(span=9, adjust=False).mean()
-                
-            elif feature == 'macd_hist':
-                # Ensure MACD is calculated first
-                if 'macd' not in df.columns:
-                    ema_12 = df['close'].ewm(span=12, adjust=False).mean()
-                    ema_26 = df['close'].ewm(span=26, adjust=False).mean()
-                    df['macd'] = ema_12 - ema_26
-                    df['macd_signal'] = df['macd'].ewm(span=9, adjust=False).mean()
-                df['macd_hist'] = df['macd'] - df['macd_signal']
-                
-            elif feature == 'rsi':
-                # RSI calculation
-                delta = df['close'].diff()
-                gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-                loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-                rs = gain / loss
-                df['rsi'] = 100 - (100 / (1 + rs))
-                
-            elif feature == 'rsi_7':
-                # RSI with period 7
-                delta = df['close'].diff()
-                gain = (delta.where(delta > 0, 0)).rolling(window=7).mean()
-                loss = (-delta.where(delta < 0, 0)).rolling(window=7).mean()
-                rs = gain / loss
-                df['rsi_7'] = 100 - (100 / (1 + rs))
-                
-            elif feature == 'bb_width':
-                # Bollinger Bands width
-                sma_20 = df['close'].rolling(window=20).mean()
-                std_20 = df['close'].rolling(window=20).std()
-                upper_band = sma_20 + (2 * std_20)
-                lower_band = sma_20 - (2 * std_20)
-                df['bb_width'] = (upper_band - lower_band) / sma_20
-                
-            elif feature == 'bb_position':
-                # Position within Bollinger Bands
-                sma_20 = df['close'].rolling(window=20).mean()
-                std_20 = df['close'].rolling(window=20).std()
-                upper_band = sma_20 + (2 * std_20)
-                lower_band = sma_20 - (2 * std_20)
-                df['bb_position'] = (df['close'] - lower_band) / (upper_band - lower_band)
-                
-            elif feature == 'price_sma7_ratio':
-                df['price_sma7_ratio'] = df['close'] / df['close'].rolling(window=7).mean()
-                
-            elif feature == 'price_sma25_ratio':
-                df['price_sma25_ratio'] = df['close'] / df['close'].rolling(window=25).mean()
-                
-            elif feature == 'sma7_sma25_ratio':
-                sma_7 = df['close'].rolling(window=7).mean()
-                sma_25 = df['close'].rolling(window=25).mean()
-                df['sma7_sma25_ratio'] = sma_7 / sma_25
-                
-            elif feature == 'trade_intensity':
-                df['trade_intensity'] = df['trades'] / df['trades'].rolling(window=20).mean()
-                
-            elif feature == 'vol_percentile':
-                df['vol_percentile'] = df['volume'].rolling(window=50).apply(
-                    lambda x: (x.iloc[-1] > x).sum() / len(x) * 100
-                )
-                
-            # Lag features
-            elif feature.endswith('_lag1'):
-                base_feature = feature.replace('_lag1', '')
-                if base_feature not in df.columns:
-                    df = self._calculate_feature(df, base_feature)
-                df[feature] = df[base_feature].shift(1)
-                
-            elif feature.endswith('_lag3'):
-                base_feature = feature.replace('_lag3', '')
-                if base_feature not in df.columns:
-                    df = self._calculate_feature(df, base_feature)
-                df[feature] = df[base_feature].shift(3)
-                
-            elif feature.endswith('_lag5'):
-                base_feature = feature.replace('_lag5', '')
-                if base_feature not in df.columns:
-                    df = self._calculate_feature(df, base_feature)
-                df[feature] = df[base_feature].shift(5)
-                
-            elif feature.endswith('_lag10'):
-                base_feature = feature.replace('_lag10', '')
-                if base_feature not in df.columns:
-                    df = self._calculate_feature(df, base_feature)
-                df[feature] = df[base_feature].shift(10)
+            fn = FEATURE_FNS.get(feature)
+            if fn is not None:
+                df[feature] = fn(df, cache)
+            else:
+                # Lag features
+                lag = _LAG_RE.match(feature)
+                if lag:
+                    base_feature = lag.group('base')
+                    if base_feature not in df.columns:
+                        df = self._calculate_feature(df, base_feature, cache)
+                    df[feature] = df[base_feature].shift(int(lag.group('periods')))
                 
         except Exception as e:
             logger.warning(f"Failed to calculate feature {feature}: {e}")
@@ -263,8 +308,4 @@ class IndicatorManager:
     
     def get_profitable_symbols(self) -> List[str]:
         """Get list of all profitable symbols"""
-        symbols = set()
-        for key in self.profitable_symbols:
-            symbol, _ = key.split('_')
-            symbols.add(symbol)
-        return list(symbols)
\ No newline at end of file
+        return list(self._best_per_symbol)
\ No newline at end of file
@@ -3,12 +3,16 @@ Composite Scoring Engine for Buy/Hold/Sell Signals
 Uses frequency-weighted technical indicators from profitable strategies
 """
 
+from math import sqrt
+
 import numpy as np
 import pandas as pd
 from typing import Dict, List, Optional, Tuple
-import logging
 
-logger = logging.getLogger(__name__)
+from core.scoring_kernels import (
+    KIND_THRESHOLD, KIND_RSI, KIND_VOLUME, KIND_VOLATILITY, KIND_RATIO, KIND_NEUTRAL,
+    technical_strength, technical_strength_rows
+)
 
 # Feature weights based on frequency in profitable strategies
 FEATURE_WEIGHTS = {
@@ -54,150 +58,211 @@ INDICATOR_THRESHOLDS = {
     'trade_intensity': {'bullish': 1.2, 'bearish': 0.8}        # Trading activity
 }
 
+def _feature_kind(feature: str) -> int:
+    """Which scoring rule (scoring_kernels.score_value kind) applies to a feature"""
+    if feature in INDICATOR_THRESHOLDS:
+        return KIND_RSI if feature == 'rsi' else KIND_THRESHOLD
+    if 'volume' in feature and 'std' not in feature:
+        return KIND_VOLUME
+    if 'std' in feature or 'atr' in feature:
+        return KIND_VOLATILITY
+    if 'ratio' in feature:
+        return KIND_RATIO
+    return KIND_NEUTRAL
+
+
+# Growth thresholds and penalties: (timeframe, min rate, zero-growth penalty, weight)
+GROWTH_THRESHOLDS = (
+    ('5m', 3, -20, 20),
+    ('15m', 5, -25, 25),
+    ('30m', 7, -30, 30),
+    ('1h', 10, -35, 25),
+)
+
+# Timeframes checked for steady, progressive growth, shortest first
+CONSISTENCY_TIMEFRAMES = ('5m', '15m', '30m', '1h')
+
+# Signal reasons as bit flags; messages are only formatted when reasons are read
+REASON_DEAD = 1 << 0
+REASON_NEGATIVE_GROWTH = 1 << 1
+REASON_EXCEPTIONAL = 1 << 2
+REASON_STRONG_POSITIVE = 1 << 3
+REASON_MODERATE_POSITIVE = 1 << 4
+REASON_MIXED = 1 << 5
+REASON_NEGATIVE = 1 << 6
+REASON_POOR = 1 << 7
+
+# Message per flag, in display order; {dead_count}/{negative_count} come from the result
+REASON_MESSAGES: Dict[int, str] = {
+    REASON_DEAD: '{dead_count} timeframe(s) with 0% growth - inactive coin',
+    REASON_NEGATIVE_GROWTH: '{negative_count} timeframes showing negative growth',
+    REASON_EXCEPTIONAL: 'Exceptional technical and growth metrics',
+    REASON_STRONG_POSITIVE: 'Strong positive indicators across metrics',
+    REASON_MODERATE_POSITIVE: 'Moderately positive signals',
+    REASON_MIXED: 'Mixed signals - monitor closely',
+    REASON_NEGATIVE: 'Predominantly negative indicators',
+    REASON_POOR: 'Poor performance across all metrics',
+}
+
+
+def reasons_of(result: 'ScoreResult') -> List[str]:
+    """Human-readable reasons behind a result's signal"""
+    flags = result.reason_flags
+    return [message.format(dead_count=result.dead_count, negative_count=result.negative_count)
+            for flag, message in REASON_MESSAGES.items() if flags & flag]
+
+
+class ScoreResult:
+    """Composite score of one symbol; raw floats, rounded only by as_dict() for display"""
+    __slots__ = ('composite', 'technical', 'growth', 'consistency',
+                 'dead_count', 'negative_count', 'signal', 'strength', 'reason_flags')
+    
+    def __init__(self, composite: float, technical: float, growth: float, consistency: float,
+                 dead_count: int, negative_count: int, signal: str, strength: int, reason_flags: int):
+        self.composite = composite
+        self.technical = technical
+        self.growth = growth
+        self.consistency = consistency
+        self.dead_count = dead_count
+        self.negative_count = negative_count
+        self.signal = signal
+        self.strength = strength
+        self.reason_flags = reason_flags
+    
+    @property
+    def reasons(self) -> List[str]:
+        return reasons_of(self)
+    
+    def as_dict(self) -> Dict:
+        """Display/API form with scores rounded to 2 decimals"""
+        return {
+            'composite_score': round(self.composite, 2),
+            'technical_score': round(self.technical, 2),
+            'growth_score': round(self.growth, 2),
+            'consistency_score': round(self.consistency, 2),
+            'dead_count': self.dead_count,
+            'signal': self.signal,
+            'signal_strength': self.strength,
+            'reasons': reasons_of(self)
+        }
+
 
 class ScoringEngine:
     """Calculate composite scores for trading signals"""
     
-    def __init__(self):
+    def __init__(self, weight_cutoff: float = 0.0):
+        """
+        weight_cutoff: features weighted below this are skipped by
+        calculate_technical_strength(fast=True), a coarser but cheaper score
+        """
         self.feature_weights = FEATURE_WEIGHTS
         self.thresholds = INDICATOR_THRESHOLDS
+        
+        # Column layout of the batch API: one column per weighted feature
+        self.feature_order: Tuple[str, ...] = tuple(FEATURE_WEIGHTS)
+        self._weights = np.array([FEATURE_WEIGHTS[f] for f in self.feature_order])
+        self._bull = np.array([INDICATOR_THRESHOLDS.get(f, {}).get('bullish', np.nan) for f in self.feature_order])
+        self._bear = np.array([INDICATOR_THRESHOLDS.get(f, {}).get('bearish', np.nan) for f in self.feature_order])
+        self._kinds = np.array([_feature_kind(f) for f in self.feature_order], dtype=np.int64)
+        self._rsi_overbought = float(INDICATOR_THRESHOLDS['rsi']['overbought'])
+        # Normalization divisor when every feature is present, summed in feature order like the kernel
+        self._total_weight_all = sum(self._weights.tolist())
+        self._scalar_params = (self._kinds, self._bull, self._bear, self._weights, self._rsi_overbought,
+                               self._total_weight_all)
+        
+        # Subset of features at or above weight_cutoff, for fast=True
+        self._weight_cutoff = weight_cutoff
+        hot = [i for i, f in enumerate(self.feature_order) if FEATURE_WEIGHTS[f] >= weight_cutoff]
+        self._features_hot: Tuple[str, ...] = tuple(self.feature_order[i] for i in hot)
+        self._scalar_params_hot = (self._kinds[hot], self._bull[hot], self._bear[hot], self._weights[hot],
+                                   self._rsi_overbought, sum(self._weights[hot].tolist()))
     
-    def calculate_technical_strength(self, indicators: Dict[str, float]) -> float:
+    def indicator_matrix(self, indicators_list: List[Dict[str, float]]) -> np.ndarray:
+        """Stack indicator dicts into an (N, F) array in feature_order, NaN where missing"""
+        return np.array(
+            [[indicators.get(f, np.nan) for f in self.feature_order] for indicators in indicators_list],
+            dtype=np.float64
+        ).reshape(len(indicators_list), len(self.feature_order))
+    
+    def calculate_technical_strength_batch(self, X: np.ndarray) -> np.ndarray:
         """
-        Calculate technical indicator strength using frequency-based weights
-        Returns a score from 0-100
+        Technical strength for N symbols at once from an (N, F) array in feature_order
+        Same scores as calculate_technical_strength; NaN marks a missing feature
+        Evaluated in float64 like the scalar path: in float32, values sitting exactly on a
+        rule boundary (0.05, 1.05, ...) round across it and land in the neighbouring band
         """
-        total_score = 0
-        total_weight = 0
-        
-        for feature, weight in self.feature_weights.items():
-            if feature in indicators and pd.notna(indicators[feature]):
-                value = indicators[feature]
-                
-                # Calculate feature score based on thresholds
-                feature_score = self._score_indicator(feature, value)
-                
-                # Apply frequency-based weight
-                weighted_score = feature_score * weight
-                total_score += weighted_score
-                total_weight += weight
-        
-        # Normalize to 0-100 scale
-        if total_weight > 0:
-            normalized_score = (total_score / total_weight) * 100
-            return min(100, max(0, normalized_score))
-        
-        return 0
+        # One fused pass per row (score, weight, normalize) instead of one array pass per rule
+        X = np.ascontiguousarray(X, dtype=np.float64)
+        return technical_strength_rows(X, *self._scalar_params)
     
-    def _score_indicator(self, feature: str, value: float) -> float:
-        """Score individual indicator (0-1 scale)"""
-        if feature not in self.thresholds:
-            # For features without specific thresholds, use generic scoring
-            return self._generic_score(feature, value)
-        
-        thresholds = self.thresholds[feature]
-        
-        # Special handling for RSI (bounded indicator)
-        if feature == 'rsi':
-            if value >= thresholds['overbought']:
-                return 0.3  # Overbought - caution
-            elif value >= thresholds['bullish']:
-                return 0.8  # Bullish range
-            elif value >= thresholds['bearish']:
-                return 0.5  # Neutral
-            else:
-                return 0.2  # Oversold
-        
-        # For other indicators
-        if 'bullish' in thresholds and 'bearish' in thresholds:
-            if value >= thresholds['bullish']:
-                return 1.0
-            elif value >= thresholds['bearish']:
-                # Linear interpolation between bearish and bullish
-                range_size = thresholds['bullish'] - thresholds['bearish']
-                if range_size > 0:
-                    return (value - thresholds['bearish']) / range_size
-                return 0.5
-            else:
-                return 0.2
-        
-        return 0.5  # Default neutral score
+    def calculate_technical_strength_from_frame(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        Technical strength for every row of a DataFrame with one column per feature
+        Prefer this over converting rows to dicts: the frame is read as one array
+        """
+        X = df.reindex(columns=list(self.feature_order)).to_numpy(dtype=np.float64)
+        return self.calculate_technical_strength_batch(X)
     
-    def _generic_score(self, feature: str, value: float) -> float:
-        """Generic scoring for indicators without specific thresholds"""
-        # Volume-related features - higher is generally better
-        if 'volume' in feature and 'std' not in feature:
-            if value > 1.5:
-                return 1.0
-            elif value > 1.0:
-                return 0.7
-            elif value > 0.5:
-                return 0.5
-            else:
-                return 0.2
-        
-        # Volatility features - moderate is best
-        elif 'std' in feature or 'atr' in feature:
-            if 0.01 < value < 0.05:
-                return 1.0  # Optimal volatility range
-            elif 0.005 < value < 0.1:
-                return 0.7
-            else:
-                return 0.3  # Too low or too high volatility
-        
-        # Ratio features - close to 1 is neutral
-        elif 'ratio' in feature:
-            if 0.95 < value < 1.05:
-                return 0.5  # Neutral
-            elif value > 1.05:
-                return min(1.0, (value - 1) * 2)  # Bullish
-            else:
-                return max(0.2, value)  # Bearish
+    def calculate_technical_strength(self, indicators: Dict[str, float], fast: bool = False) -> float:
+        """
+        Calculate technical indicator strength using frequency-based weights
+        Returns a score from 0-100
+        fast=True scores only features weighted at or above weight_cutoff, normalized by their weight
+        """
+        if fast:
+            features, params = self._features_hot, self._scalar_params_hot
+        else:
+            features, params = self.feature_order, self._scalar_params
         
-        return 0.5  # Default neutral
+        # One compiled call per symbol; missing features become NaN and are skipped
+        get = indicators.get
+        x = np.array([get(f) for f in features], dtype=np.float64)
+        return technical_strength(x, *params)
     
     def calculate_growth_score(self, growth_rates: Dict[str, Optional[float]]) -> Tuple[float, int]:
         """
         Calculate growth score with dead coin penalties
         Returns: (score, dead_count)
         """
+        score, dead_count, _ = self._growth_score(growth_rates)
+        return score, dead_count
+    
+    def _growth_score(self, growth_rates: Dict[str, Optional[float]]) -> Tuple[float, int, List[float]]:
+        """
+        calculate_growth_score, also returning the rates it found in timeframe order
+        so the consistency score can reuse them instead of looking them up again
+        """
         score = 0
         dead_count = 0
+        rates = []
         
-        # Growth thresholds and penalties
-        thresholds = {
-            '5m': {'min': 3, 'zero_penalty': -20, 'weight': 20},
-            '15m': {'min': 5, 'zero_penalty': -25, 'weight': 25},
-            '30m': {'min': 7, 'zero_penalty': -30, 'weight': 30},
-            '1h': {'min': 10, 'zero_penalty': -35, 'weight': 25}
-        }
-        
-        for timeframe, config in thresholds.items():
+        for timeframe, min_rate, zero_penalty, weight in GROWTH_THRESHOLDS:
             rate = growth_rates.get(timeframe)
             
             if rate is None:
                 continue
+            rates.append(rate)
             
             if rate == 0:
                 # Dead coin penalty
-                score += config['zero_penalty']
+                score += zero_penalty
                 dead_count += 1
             elif rate < 0:
                 # Negative growth - half penalty
-                score += config['zero_penalty'] * 0.5
-            elif rate < config['min']:
+                score += zero_penalty * 0.5
+            elif rate < min_rate:
                 # Below threshold - partial score
-                partial_score = (rate / config['min']) * config['weight']
-                score += partial_score
+                score += (rate / min_rate) * weight
             else:
                 # Above threshold - full score
-                score += config['weight']
+                score += weight
         
         # Cap score if dead periods detected
         if dead_count > 0:
-            score = min(score, 20)
+            if score > 20:
+                score = 20
         
-        return max(0, score), dead_count
+        return (score if score > 0 else 0), dead_count, rates
     
     def calculate_consistency_score(self, growth_rates: Dict[str, Optional[float]]) -> float:
         """
@@ -205,58 +270,69 @@ class ScoringEngine:
         Checks for steady, progressive growth
         """
         # Extract rates for consistency check
-        timeframes = ['5m', '15m', '30m', '1h']
-        rates = []
-        
-        for tf in timeframes:
-            rate = growth_rates.get(tf)
-            if rate is not None:
-                rates.append(rate)
-        
+        rates = [rate for rate in map(growth_rates.get, CONSISTENCY_TIMEFRAMES) if rate is not None]
+        return self._consistency_score(rates)
+    
+    def _consistency_score(self, rates: List[float]) -> float:
+        """calculate_consistency_score on the present rates, in CONSISTENCY_TIMEFRAMES order"""
         if len(rates) < 3:
             return 0  # Not enough data
         
-        # Check all positive
-        if any(r <= 0 for r in rates):
-            return 0  # Consistency broken by negative/zero growth
-        
-        # Calculate consistency metrics
+        # Calculate consistency metrics in a single pass over consecutive timeframes
         score = 100
+        total = 0.0
+        prev = None
+        for rate in rates:
+            # Check all positive
+            if rate <= 0:
+                return 0  # Consistency broken by negative/zero growth
+            
+            if prev is not None:
+                # 1. Check progressive growth (each timeframe > previous)
+                if rate <= prev:
+                    score -= 20  # Penalty for non-progressive growth
+                
+                # 2. Check volatility between timeframes
+                diff = abs(rate - prev)
+                if diff > 10:  # Large jump
+                    score -= 15
+                elif diff > 5:  # Moderate jump
+                    score -= 10
+            
+            total += rate
+            prev = rate
         
-        # 1. Check progressive growth (each timeframe > previous)
-        for i in range(1, len(rates)):
-            if rates[i] <= rates[i-1]:
-                score -= 20  # Penalty for non-progressive growth
-        
-        # 2. Check volatility between timeframes
-        for i in range(1, len(rates)):
-            diff = abs(rates[i] - rates[i-1])
-            if diff > 10:  # Large jump
-                score -= 15
-            elif diff > 5:  # Moderate jump
-                score -= 10
-        
-        # 3. Reward steady growth
-        avg_rate = sum(rates) / len(rates)
-        std_dev = np.std(rates)
+        # 3. Reward steady growth (population std, as np.std)
+        avg_rate = total / len(rates)
+        squares = 0.0
+        for rate in rates:
+            squares += (rate - avg_rate) ** 2
+        std_dev = sqrt(squares / len(rates))
         if std_dev < avg_rate * 0.3:  # Low volatility relative to average
             score += 10
         
-        return max(0, min(100, score))
+        # score is an int here, so the clamp is two comparisons
+        if score > 100:
+            return 100
+        return score if score > 0 else 0
     
     def calculate_composite_score(self, 
                                 symbol_data: Dict,
-                                indicators: Dict[str, float]) -> Dict:
+                                indicators: Dict[str, float],
+                                tech_score: Optional[float] = None) -> ScoreResult:
         """
         Calculate composite score and generate trading signal
+        tech_score can be passed in when it was already computed by the batch API
         """
         # Extract growth rates
         growth_rates = symbol_data.get('growth_rates', {})
         
         # Calculate component scores
-        tech_score = self.calculate_technical_strength(indicators)
-        growth_score, dead_count = self.calculate_growth_score(growth_rates)
-        consistency_score = self.calculate_consistency_score(growth_rates)
+        if tech_score is None:
+            tech_score = self.calculate_technical_strength(indicators)
+        # GROWTH_THRESHOLDS walks the same timeframes as the consistency check, in the same order
+        growth_score, dead_count, rates = self._growth_score(growth_rates)
+        consistency_score = self._consistency_score(rates)
         
         # Activity multiplier based on dead periods
         if dead_count == 0:
@@ -276,63 +352,57 @@ class ScoringEngine:
         # Generate signal
         signal = self._generate_signal(composite_score, dead_count, growth_rates)
         
-        return {
-            'composite_score': round(composite_score, 2),
-            'technical_score': round(tech_score, 2),
-            'growth_score': round(growth_score, 2),
-            'consistency_score': round(consistency_score, 2),
-            'dead_count': dead_count,
-            'signal': signal['type'],
-            'signal_strength': signal['strength'],
-            'reasons': signal['reasons']
-        }
+        return ScoreResult(composite_score, tech_score, growth_score, consistency_score, dead_count,
+                           signal['negative_count'], signal['type'], signal['strength'], signal['reason_flags'])
     
     def _generate_signal(self, composite_score: float, dead_count: int, 
                         growth_rates: Dict) -> Dict:
-        """Generate trading signal based on composite score"""
-        reasons = []
-        
+        """Generate trading signal based on composite score; reasons are returned as REASON_* flags"""
         # Check for dead coin first
         if dead_count > 0:
             return {
                 'type': 'DEAD',
                 'strength': 0,
-                'reasons': [f'{dead_count} timeframe(s) with 0% growth - inactive coin']
+                'reason_flags': REASON_DEAD,
+                'negative_count': 0
             }
         
         # Check for negative growth
-        negative_count = sum(1 for r in growth_rates.values() if r is not None and r < 0)
-        if negative_count > 1:
-            reasons.append(f'{negative_count} timeframes showing negative growth')
+        negative_count = 0
+        for r in growth_rates.values():
+            if r is not None and r < 0:
+                negative_count += 1
+        reason_flags = REASON_NEGATIVE_GROWTH if negative_count > 1 else 0
         
         # Generate signal based on composite score
         if composite_score >= 80:
             signal_type = 'STRONG_BUY'
             strength = 5
-            reasons.append('Exceptional technical and growth metrics')
+            reason_flags |= REASON_EXCEPTIONAL
         elif composite_score >= 70:
             signal_type = 'BUY'
             strength = 4
-            reasons.append('Strong positive indicators across metrics')
+            reason_flags |= REASON_STRONG_POSITIVE
         elif composite_score >= 60:
             signal_type = 'WEAK_BUY'
             strength = 3
-            reasons.append('Moderately positive signals')
+            reason_flags |= REASON_MODERATE_POSITIVE
         elif composite_score >= 50:
             signal_type = 'HOLD'
             strength = 2
-            reasons.append('Mixed signals - monitor closely')
+            reason_flags |= REASON_MIXED
         elif composite_score >= 30:
             signal_type = 'WEAK_SELL'
             strength = 1
-            reasons.append('Predominantly negative indicators')
+            reason_flags |= REASON_NEGATIVE
         else:
             signal_type = 'STRONG_SELL'
             strength = 0
-            reasons.append('Poor performance across all metrics')
+            reason_flags |= REASON_POOR
         
         return {
             'type': signal_type,
             'strength': strength,
-            'reasons': reasons
+            'reason_flags': reason_flags,
+            'negative_count': negative_count
         }
\ No newline at end of file
@@ -2,27 +2,63 @@
 Binance API integration and price tracking logic
 """
 
+import json
 import requests
+import threading
 import time
+from bisect import bisect_right
+from collections import OrderedDict, defaultdict, deque
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
+from itertools import repeat
 from typing import List, Dict, Tuple, Optional
 import logging
+from math import sqrt
 import numpy as np
 import pandas as pd
 
 from config import (
     BINANCE_API_URL, TARGET_STABLECOINS, PRICE_RANGE,
-    API_RATE_LIMIT_DELAY, MAX_CONCURRENT_REQUESTS,
     TIME_INTERVALS, BATCH_SIZE, CONSISTENCY_THRESHOLD,
-    CONSISTENCY_MAX_DIFF
+    CONSISTENCY_MAX_DIFF, BINANCE_WS_URL, PRICE_STREAM_ENABLED, PRICE_STREAM_MAX_AGE,
+    PRICE_SNAPSHOT_TTL, BTC_RETURNS_TTL, API_REQUEST_TIMEOUT, INDICATOR_CACHE_SIZE,
+    PRICE_BUFFER_MINUTES, INTERVAL_WINDOW_SECONDS
 )
+# Lowered in cloud mode; the Postgres connection pool is sized from the same value
+from config_cloud import MAX_CONCURRENT_REQUESTS
 from core.database import Database
 from core.indicator_manager import IndicatorManager
 from core.scoring_engine import ScoringEngine
+from core.ws_client import PriceStream
+
+try:
+    # Several times faster than json on the exchange-wide ticker and kline payloads
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
 
 logger = logging.getLogger(__name__)
 
+# Stand-in for a symbol without price history
+_NO_PRICES = np.empty(0)
+
+# Hourly timeframes checked by the consistency score
+CONSISTENCY_INTERVALS = ('1h', '2h', '4h', '7h', '12h')
+
+# Weight of each timeframe in the overall performance score
+OVERALL_WEIGHTS = (
+    ('5m', 0.5),    # Lower weight for very short term
+    ('15m', 0.6),   # Lower weight for short term
+    ('30m', 0.7),   # Lower weight for short term
+    ('1h', 1.0),    # Full weight for hourly and above
+    ('2h', 1.0),
+    ('4h', 1.0),
+    ('7h', 1.0),
+    ('12h', 1.2),   # Slightly higher weight for longest timeframe
+)
+
 
 class BinanceTracker:
     """Handles Binance API calls and price tracking"""
@@ -30,7 +66,21 @@ class BinanceTracker:
     def __init__(self, database: Database, profitable_symbols_path: str = None):
         self.db = database
         self.base_url = BINANCE_API_URL
-        self.session = requests.Session()
+        self.session = self._create_session()
+        # Live prices over WebSocket; started by the first REST snapshot in get_all_prices()
+        self._price_stream = PriceStream(BINANCE_WS_URL, PRICE_STREAM_MAX_AGE) if PRICE_STREAM_ENABLED else None
+        # Last REST snapshot as (monotonic time, prices), shared for PRICE_SNAPSHOT_TTL
+        self._prices_cache: Tuple[float, Dict[str, float]] = (0.0, {})
+        self._prices_lock = threading.Lock()
+        # Bitcoin's returns per history length as (monotonic time, returns), see _bitcoin_returns()
+        self._btc_returns_cache: Dict[int, Tuple[float, np.ndarray]] = {}
+        # Indicators keyed by the klines they were computed from, LRU-bounded
+        self._indicator_cache: 'OrderedDict[Tuple, Dict]' = OrderedDict()
+        self._indicator_cache_lock = threading.Lock()
+        # Recent (unix time, price) samples per tracked symbol written by update_prices(), oldest
+        # first; trimmed by age, since refreshes and jitter make the sample count per minute vary
+        self._price_buffers: Dict[str, deque] = defaultdict(deque)
+        self._price_buffers_lock = threading.Lock()
         self._symbol_cache = {}
         self._last_symbol_update = None
         
@@ -40,26 +90,67 @@ class BinanceTracker:
         
         self.indicator_manager = IndicatorManager(profitable_symbols_path)
         self.scoring_engine = ScoringEngine()
+        
+        # Worker pool for kline fetches, shared by every refresh so threads and their
+        # keep-alive connections outlive a single batch
+        self._executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_REQUESTS,
+                                            thread_name_prefix='tracker')
+    
+    @staticmethod
+    def _create_session() -> requests.Session:
+        """
+        HTTP session whose connection pool fits the concurrent kline fetches, so
+        keep-alive connections are reused instead of re-opened past the default 10,
+        with retries for rate-limit and transient server errors on GETs
+        """
+        session = requests.Session()
+        retry = Retry(total=3, backoff_factor=0.2, status_forcelist=(429, 500, 502, 503, 504),
+                      allowed_methods=frozenset(['GET']))
+        adapter = HTTPAdapter(pool_connections=MAX_CONCURRENT_REQUESTS * 2,
+                              pool_maxsize=MAX_CONCURRENT_REQUESTS * 2, max_retries=retry)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers.update({'User-Agent': 'binance-tracker/2'})
+        return session
     
     def get_exchange_info(self) -> Dict:
         """Get exchange information from Binance"""
         try:
-            response = self.session.get(f"{self.base_url}/exchangeInfo")
+            response = self.session.get(f"{self.base_url}/exchangeInfo", timeout=API_REQUEST_TIMEOUT)
             response.raise_for_status()
-            return response.json()
+            return _json_loads(response.content)
         except Exception as e:
             logger.error(f"Failed to get exchange info: {e}")
             return {}
     
     def get_all_prices(self) -> Dict[str, float]:
-        """Get all current prices in one API call"""
-        try:
-            response = self.session.get(f"{self.base_url}/ticker/price")
-            response.raise_for_status()
-            return {item['symbol']: float(item['price']) for item in response.json()}
-        except Exception as e:
-            logger.error(f"Failed to get prices: {e}")
-            return {}
+        """
+        Get all current prices, from the live stream when it is fresh, else in one API call
+        A REST snapshot is shared by every caller within PRICE_SNAPSHOT_TTL; treat it as read-only
+        """
+        if self._price_stream is not None:
+            prices = self._price_stream.snapshot()
+            if prices is not None:
+                return prices
+        
+        # Held across the request so concurrent callers wait for one fetch instead of each
+        # downloading the exchange-wide dump
+        with self._prices_lock:
+            fetched_at, prices = self._prices_cache
+            if prices and time.monotonic() - fetched_at < PRICE_SNAPSHOT_TTL:
+                return prices
+            
+            try:
+                response = self.session.get(f"{self.base_url}/ticker/price", timeout=API_REQUEST_TIMEOUT)
+                response.raise_for_status()
+                prices = {item['symbol']: float(item['price']) for item in _json_loads(response.content)}
+                self._prices_cache = (time.monotonic(), prices)
+                if self._price_stream is not None:
+                    self._price_stream.seed(prices)
+                return prices
+            except Exception as e:
+                logger.error(f"Failed to get prices: {e}")
+                return {}
     
     def get_relevant_symbols(self) -> List[str]:
         """Get symbols that match our criteria"""
@@ -116,122 +207,175 @@ class BinanceTracker:
         # Store in database
         if relevant_prices:
             self.db.store_prices(relevant_prices)
+            self._buffer_prices(relevant_prices, symbols)
             logger.info(f"Updated prices for {len(relevant_prices)} symbols")
     
-    def calculate_growth_rate(self, symbol: str, interval_name: str, current_price: float) -> Optional[float]:
-        """Calculate growth rate for a specific interval"""
+    def _buffer_prices(self, prices: Dict[str, float], tracked: List[str]):
+        """
+        Append a price sample per symbol, dropping samples older than PRICE_BUFFER_MINUTES
+        and the buffers of symbols that are no longer tracked
+        """
+        now = time.time()
+        cutoff = now - PRICE_BUFFER_MINUTES * 60
+        tracked = set(tracked)
+        
+        with self._price_buffers_lock:
+            buffers = self._price_buffers
+            for symbol in [symbol for symbol in buffers if symbol not in tracked]:
+                del buffers[symbol]
+            
+            for symbol, price in prices.items():
+                buffers[symbol].append((now, price))
+            
+            for samples in buffers.values():
+                while samples and samples[0][0] < cutoff:
+                    samples.popleft()
+    
+    def _buffered_prices_at(self, symbols: List[str],
+                            minutes_list: List[int]) -> Tuple[Dict[Tuple[str, int], float], List[str]]:
+        """
+        Interval prices from the in-memory buffers, in the shape of Database.get_prices_at_intervals:
+        the newest sample at or before each target time, at most 2 minutes older. Returns (prices, cold),
+        cold being the symbols whose buffer doesn't reach back to the longest interval yet, to be read
+        from the DB
+        """
+        now = time.time()
+        oldest_needed = now - max(minutes_list) * 60 - INTERVAL_WINDOW_SECONDS
+        prices: Dict[Tuple[str, int], float] = {}
+        cold = []
+        
+        with self._price_buffers_lock:
+            for symbol in symbols:
+                samples = self._price_buffers.get(symbol)
+                if not samples or samples[0][0] > oldest_needed:
+                    cold.append(symbol)
+                    continue
+                
+                for minutes in minutes_list:
+                    target = now - minutes * 60
+                    # Last sample at or before the target, if it is inside the window
+                    i = bisect_right(samples, (target, float('inf'))) - 1
+                    if i >= 0 and samples[i][0] >= target - INTERVAL_WINDOW_SECONDS:
+                        prices[(symbol, minutes)] = samples[i][1]
+        
+        return prices, cold
+    
+    def calculate_growth_rate(self, symbol: str, interval_name: str, current_price: float,
+                              prices_at: Optional[Dict[Tuple[str, int], float]] = None) -> Optional[float]:
+        """Calculate growth rate for a specific interval, optionally from prefetched interval prices"""
         minutes = TIME_INTERVALS.get(interval_name)
         if not minutes:
             return None
         
-        historical_price = self.db.get_price_at_interval(symbol, minutes)
+        if prices_at is None:
+            historical_price = self.db.get_price_at_interval(symbol, minutes)
+        else:
+            historical_price = prices_at.get((symbol, minutes))
         if historical_price and historical_price > 0:
             return ((current_price - historical_price) / historical_price) * 100
         
         return None
     
-    def calculate_bitcoin_correlation(self, symbol: str, hours: int = 24) -> Optional[float]:
-        """Calculate correlation with Bitcoin"""
+    @staticmethod
+    def _returns(prices: np.ndarray) -> np.ndarray:
+        """Percent returns between consecutive prices"""
+        if prices.size < 2:
+            return np.empty(0)
+        return np.diff(prices) / prices[:-1] * 100
+    
+    def _bitcoin_returns(self, hours: int) -> np.ndarray:
+        """Bitcoin's returns over the last hours, re-read at most every BTC_RETURNS_TTL seconds"""
+        now = time.monotonic()
+        cached = self._btc_returns_cache.get(hours)
+        if cached is not None and now - cached[0] < BTC_RETURNS_TTL:
+            return cached[1]
+        
+        btc_returns = self._returns(self.db.get_price_array('BTCUSDT', hours))
+        self._btc_returns_cache[hours] = (now, btc_returns)
+        return btc_returns
+    
+    def calculate_bitcoin_correlation(self, symbol: str, hours: int = 24,
+                                      histories: Optional[Dict[str, np.ndarray]] = None,
+                                      btc_returns: Optional[np.ndarray] = None) -> Optional[float]:
+        """
+        Calculate correlation with Bitcoin, optionally from prefetched price arrays
+        (Database.get_price_arrays); btc_returns lets a caller scoring many symbols
+        compute Bitcoin's returns only once
+        """
         if symbol == 'BTCUSDT':
             return 100.0
         
-        # Get price history for both symbols
-        symbol_history = self.db.get_price_history(symbol, hours)
-        btc_history = self.db.get_price_history('BTCUSDT', hours)
-        
-        if len(symbol_history) < 10 or len(btc_history) < 10:
+        # Get price history for both symbols; standalone calls share a recent copy of Bitcoin's
+        if histories is None:
+            symbol_prices = self.db.get_price_array(symbol, hours)
+            if btc_returns is None:
+                btc_returns = self._bitcoin_returns(hours)
+        else:
+            symbol_prices = histories.get(symbol, _NO_PRICES)
+            if btc_returns is None:
+                btc_returns = self._returns(histories.get('BTCUSDT', _NO_PRICES))
+        
+        # n prices give n - 1 returns
+        if symbol_prices.size < 10 or btc_returns.size < 9:
             return None
         
-        # Convert to hourly returns
-        def calculate_returns(history):
-            prices = [price for _, price in history]
-            if len(prices) < 2:
-                return []
-            returns = [(prices[i] - prices[i-1]) / prices[i-1] * 100 
-                      for i in range(1, len(prices))]
-            return returns
-        
-        symbol_returns = calculate_returns(symbol_history)
-        btc_returns = calculate_returns(btc_history)
-        
-        if not symbol_returns or not btc_returns:
-            return None
+        symbol_returns = self._returns(symbol_prices)
         
         # Align lengths
-        min_len = min(len(symbol_returns), len(btc_returns))
-        symbol_returns = symbol_returns[-min_len:]
-        btc_returns = btc_returns[-min_len:]
-        
-        if len(symbol_returns) < 3:
+        min_len = min(symbol_returns.size, btc_returns.size)
+        if min_len < 3:
             return None
         
         # Calculate correlation
         try:
-            correlation = np.corrcoef(symbol_returns, btc_returns)[0, 1]
+            correlation = np.corrcoef(symbol_returns[-min_len:], btc_returns[-min_len:])[0, 1]
             return correlation * 100  # Return as percentage
         except:
             return None
     
     def calculate_consistency_score(self, growth_rates: Dict[str, Optional[float]]) -> Optional[float]:
         """Calculate consistency score based on steady growth across timeframes"""
-        # Get valid growth rates for hourly timeframes (1h to 12h)
-        valid_rates = []
-        for interval in ['1h', '2h', '4h', '7h', '12h']:
-            rate = growth_rates.get(interval)
-            if rate is not None and rate > 0:
-                valid_rates.append(rate)
+        # Get valid (positive) growth rates for hourly timeframes (1h to 12h)
+        valid_rates = [rate for rate in map(growth_rates.get, CONSISTENCY_INTERVALS)
+                       if rate is not None and rate > 0]
+        count = len(valid_rates)
         
         # Need at least 4 positive timeframes to calculate consistency
-        if len(valid_rates) < 4:
+        if count < 4:
             return None
         
-        # Calculate the maximum difference between consecutive timeframes
+        # The difference between consecutive sorted rates must stay within threshold
         valid_rates.sort()  # Sort to check progression
-        max_diff = 0
-        for i in range(1, len(valid_rates)):
-            diff = abs(valid_rates[i] - valid_rates[i-1])
-            max_diff = max(max_diff, diff)
-        
-        # Calculate consistency score
-        # Start with 100% and reduce based on volatility
-        if max_diff <= CONSISTENCY_MAX_DIFF:
-            # If difference is within threshold, calculate score based on how steady the growth is
-            avg_rate = sum(valid_rates) / len(valid_rates)
-            if avg_rate <= 0:
+        prev = valid_rates[0]
+        for rate in valid_rates:
+            if rate - prev > CONSISTENCY_MAX_DIFF:
                 return None
-            
-            # Score based on how close rates are to each other
-            variance = sum((rate - avg_rate) ** 2 for rate in valid_rates) / len(valid_rates)
-            std_dev = variance ** 0.5
-            
-            # Convert to score (lower std_dev = higher score)
-            consistency = max(0, 100 - (std_dev / avg_rate * 100))
-            
-            # Only return if above threshold
-            if consistency >= CONSISTENCY_THRESHOLD:
-                return round(consistency, 1)
+            prev = rate
+        
+        # Score based on how close rates are to each other (all positive, so avg_rate > 0)
+        avg_rate = sum(valid_rates) / count
+        squares = 0.0
+        for rate in valid_rates:
+            squares += (rate - avg_rate) ** 2
+        std_dev = sqrt(squares / count)
+        
+        # Convert to score (lower std_dev = higher score)
+        consistency = 100 - (std_dev / avg_rate * 100)
+        if consistency < 0:
+            consistency = 0
+        
+        # Only return if above threshold
+        if consistency >= CONSISTENCY_THRESHOLD:
+            return round(consistency, 1)
         
         return None
     
     def calculate_overall_performance(self, growth_rates: Dict[str, Optional[float]]) -> Optional[float]:
         """Calculate overall performance score across all timeframes"""
-        # Get all valid growth rates
-        valid_rates = []
-        weights = {
-            '5m': 0.5,    # Lower weight for very short term
-            '15m': 0.6,   # Lower weight for short term
-            '30m': 0.7,   # Lower weight for short term
-            '1h': 1.0,    # Full weight for hourly and above
-            '2h': 1.0,
-            '4h': 1.0,
-            '7h': 1.0,
-            '12h': 1.2    # Slightly higher weight for longest timeframe
-        }
-        
         weighted_sum = 0
         total_weight = 0
         
-        for interval, weight in weights.items():
+        for interval, weight in OVERALL_WEIGHTS:
             rate = growth_rates.get(interval)
             if rate is not None:
                 weighted_sum += rate * weight
@@ -248,10 +392,11 @@ class BinanceTracker:
         latest_prices = self.db.get_latest_prices()
         all_current_prices = self.get_all_prices()
         
-        # Update with fresh prices
-        for symbol, price in all_current_prices.items():
-            if symbol in latest_prices or symbol in self.get_relevant_symbols():
-                latest_prices[symbol] = price
+        # Update with fresh prices, walking only the tracked/relevant symbols (a few hundred)
+        # rather than the exchange-wide price dump
+        tracked = set(self.get_relevant_symbols()).union(latest_prices)
+        latest_prices.update({symbol: all_current_prices[symbol] for symbol in tracked
+                              if symbol in all_current_prices})
         
         # Always include Bitcoin for correlation
         if 'BTCUSDT' not in latest_prices:
@@ -259,18 +404,39 @@ class BinanceTracker:
             if btc_price > 0:
                 latest_prices['BTCUSDT'] = btc_price
         
+        # Skip symbols not in our target range (except Bitcoin). A dict comprehension beats a
+        # NumPy mask here: building the symbol/price arrays costs more than the comparisons
+        price_lo, price_hi = PRICE_RANGE
+        in_range = {symbol: price for symbol, price in latest_prices.items()
+                    if symbol == 'BTCUSDT' or price_lo <= price <= price_hi}
+        
+        # Interval prices from memory where the buffers are warm, one query for the rest,
+        # and one query for every history the loop needs
+        minutes_list = list(TIME_INTERVALS.values())
+        prices_at, cold = self._buffered_prices_at(list(in_range), minutes_list)
+        if cold:
+            prices_at.update(self.db.get_prices_at_intervals(cold, minutes_list))
+        histories = self.db.get_price_arrays([*in_range, 'BTCUSDT'], 24)
+        btc_returns = self._returns(histories['BTCUSDT'])
+        
         trending_data = []
         
-        for symbol, current_price in latest_prices.items():
-            # Skip if not in our target range (except Bitcoin)
-            if symbol != 'BTCUSDT' and not (PRICE_RANGE[0] <= current_price <= PRICE_RANGE[1]):
-                continue
-            
-            # Calculate growth rates for all intervals
+        # Growth rates stay a per-symbol loop: filling an (N, intervals) matrix from the
+        # prefetched prices and unpacking it back into per-symbol dicts costs more than
+        # the division it vectorizes
+        intervals = tuple(TIME_INTERVALS.items())
+        price_at = prices_at.get
+        
+        for symbol, current_price in in_range.items():
+            # Growth rates for all intervals straight from the prefetched prices
+            # (same formula as calculate_growth_rate, without a method call per interval)
             growth_rates = {}
-            for interval_name in TIME_INTERVALS.keys():
-                rate = self.calculate_growth_rate(symbol, interval_name, current_price)
-                growth_rates[interval_name] = rate
+            for interval_name, minutes in intervals:
+                historical_price = price_at((symbol, minutes))
+                if historical_price and historical_price > 0:
+                    growth_rates[interval_name] = ((current_price - historical_price) / historical_price) * 100
+                else:
+                    growth_rates[interval_name] = None
             
             # Skip if no valid growth data
             valid_rates = [r for r in growth_rates.values() if r is not None]
@@ -278,7 +444,7 @@ class BinanceTracker:
                 continue
             
             # Calculate Bitcoin correlation
-            btc_correlation = self.calculate_bitcoin_correlation(symbol, 24)
+            btc_correlation = self.calculate_bitcoin_correlation(symbol, 24, histories, btc_returns)
             
             # Calculate consistency score
             consistency_score = self.calculate_consistency_score(growth_rates)
@@ -322,28 +488,30 @@ class BinanceTracker:
                 'interval': interval,
                 'limit': limit
             }
-            response = self.session.get(f"{self.base_url}/klines", params=params)
+            response = self.session.get(f"{self.base_url}/klines", params=params,
+                                        timeout=API_REQUEST_TIMEOUT)
             response.raise_for_status()
             
-            # Convert to DataFrame
-            data = response.json()
-            df = pd.DataFrame(data, columns=[
-                'timestamp', 'open', 'high', 'low', 'close', 'volume',
-                'close_time', 'quote_volume', 'count', 'taker_buy_base',
-                'taker_buy_quote', 'ignore'
-            ])
-            df.rename(columns={'count': 'trades'}, inplace=True)
-            
-            # Convert to numeric
-            numeric_columns = ['open', 'high', 'low', 'close', 'volume', 'quote_volume', 'trades']
-            for col in numeric_columns:
-                df[col] = pd.to_numeric(df[col], errors='coerce')
+            data = _json_loads(response.content)
+            if not data:
+                return None
             
-            # Convert timestamp to datetime
-            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-            df.set_index('timestamp', inplace=True)
+            # Rows are [open time, open, high, low, close, volume, close time, quote volume,
+            # trades, taker base, taker quote, ignore]; only the columns the indicators
+            # read are converted, each with one typed cast
+            arr = np.asarray(data, dtype=object)
+            ohlcv = arr[:, 1:6].astype(np.float64)
+            timestamps = pd.to_datetime(arr[:, 0].astype(np.int64), unit='ms')
             
-            return df
+            return pd.DataFrame({
+                'open': ohlcv[:, 0],
+                'high': ohlcv[:, 1],
+                'low': ohlcv[:, 2],
+                'close': ohlcv[:, 3],
+                'volume': ohlcv[:, 4],
+                'quote_volume': arr[:, 7].astype(np.float64),
+                'trades': arr[:, 8].astype(np.int64)
+            }, index=pd.DatetimeIndex(timestamps, name='timestamp'))
             
         except Exception as e:
             logger.error(f"Failed to get klines for {symbol}: {e}")
@@ -357,28 +525,41 @@ class BinanceTracker:
             if df is None or df.empty:
                 return None
             
-            # Calculate indicators based on symbol's top features
-            df = self.indicator_manager.calculate_indicators(df, symbol, interval)
+            # Closed candles never change, so the open time, close and volume of the newest
+            # (still forming) candle identify the whole window; any trade moves the volume
+            key = (symbol, interval, df.index[-1].value, df['close'].iat[-1], df['volume'].iat[-1])
+            with self._indicator_cache_lock:
+                cached = self._indicator_cache.get(key)
+                if cached is not None:
+                    self._indicator_cache.move_to_end(key)
+                    return dict(cached)
             
-            # Get the latest values
-            latest_row = df.iloc[-1]
+            # Calculate indicators based on symbol's top features
             features = self.indicator_manager.get_features_for_symbol(symbol, interval)
+            df = self.indicator_manager.calculate_indicators(df, symbol, interval)
             
-            # Extract indicator values
+            # Extract the latest value of each computed feature column; reading single
+            # cells avoids materializing the whole last row as a Series
+            columns = df.columns
             indicators = {}
-            for feature in features:
-                if feature in latest_row.index:
-                    value = latest_row[feature]
-                    if pd.notna(value):
-                        indicators[feature] = float(value)
+            for feature in [f for f in features if f in columns]:
+                value = df[feature].iat[-1]
+                # value == value is False only for NaN; skips pandas' scalar dispatch
+                if value == value:
+                    indicators[feature] = float(value)
             
             # Add metadata
             indicators['symbol'] = symbol
             indicators['interval'] = interval
             indicators['timestamp'] = df.index[-1].isoformat()
-            indicators['price'] = float(latest_row['close'])
+            indicators['price'] = float(df['close'].iat[-1])
+            
+            with self._indicator_cache_lock:
+                self._indicator_cache[key] = indicators
+                if len(self._indicator_cache) > INDICATOR_CACHE_SIZE:
+                    self._indicator_cache.popitem(last=False)
             
-            return indicators
+            return dict(indicators)
             
         except Exception as e:
             logger.error(f"Failed to calculate indicators for {symbol}: {e}")
@@ -389,7 +570,11 @@ class BinanceTracker:
         return self.indicator_manager.get_profitable_symbols()
     
     def update_with_indicators(self):
-        """Update prices and calculate indicators for profitable symbols"""
+        """
+        Update prices and calculate indicators for profitable symbols
+        Kline fetches stay on worker threads: each thread spends its time blocked in
+        socket I/O with the GIL released, and the pooled session keeps connections alive
+        """
         # Get profitable symbols
         profitable_symbols = self.get_profitable_symbols()
         
@@ -401,32 +586,29 @@ class BinanceTracker:
         
         logger.info(f"Updating {len(all_symbols)} symbols ({len(profitable_symbols)} profitable)")
         
-        # Process in batches
-        batch_size = 10
-        for i in range(0, len(all_symbols), batch_size):
-            batch = all_symbols[i:i+batch_size]
-            
-            with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_REQUESTS) as executor:
-                futures = []
-                
-                for symbol in batch:
-                    # Calculate indicators for multiple timeframes
-                    for interval in ['5m', '15m', '30m', '1h']:
-                        future = executor.submit(self.calculate_technical_indicators, symbol, interval)
-                        futures.append((symbol, interval, future))
-                
-                # Process results
-                for symbol, interval, future in futures:
-                    try:
-                        result = future.result(timeout=10)
-                        if result:
-                            # Store indicators in database (would need to add this method)
-                            logger.debug(f"Calculated indicators for {symbol} {interval}: {list(result.keys())}")
-                    except Exception as e:
-                        logger.error(f"Failed to process {symbol} {interval}: {e}")
-            
-            # Rate limiting
-            time.sleep(API_RATE_LIMIT_DELAY)
+        # Every (symbol, timeframe) goes to the shared pool up front; the semaphore bounds
+        # how many are queued or in flight, so requests flow steadily instead of in
+        # bursts separated by sleeps
+        permits = threading.Semaphore(BATCH_SIZE)
+        futures = {}
+        for symbol in all_symbols:
+            # Calculate indicators for multiple timeframes
+            for interval in ['5m', '15m', '30m', '1h']:
+                permits.acquire()
+                future = self._executor.submit(self.calculate_technical_indicators, symbol, interval)
+                future.add_done_callback(lambda _: permits.release())
+                futures[future] = (symbol, interval)
+        
+        # Process results
+        for future in as_completed(futures):
+            symbol, interval = futures[future]
+            try:
+                result = future.result()
+                if result:
+                    # Store indicators in database (would need to add this method)
+                    logger.debug(f"Calculated indicators for {symbol} {interval}: {list(result.keys())}")
+            except Exception as e:
+                logger.error(f"Failed to process {symbol} {interval}: {e}")
     
     def get_enhanced_trending_data(self) -> List[Dict]:
         """Get trending data with composite scores and trading signals"""
@@ -436,30 +618,45 @@ class BinanceTracker:
         # Enhance with technical indicators and composite scores
         enhanced_data = []
         
-        for entry in trending_data:
+        # Calculate technical indicators for main timeframe (15m); the kline fetches
+        # overlap on the shared pool, and map() keeps results in trending order
+        all_indicators = self._executor.map(self.calculate_technical_indicators,
+                                            [entry['symbol'] for entry in trending_data],
+                                            repeat('15m'))
+        scored = []
+        for entry, indicators in zip(trending_data, all_indicators):
+            if indicators:
+                scored.append((entry, indicators))
+            else:
+                # No indicators available - add basic entry
+                enhanced_data.append(entry)
+        
+        # Technical strength for every symbol in one vectorized pass; if one malformed indicator
+        # dict breaks the batch, each symbol is scored on its own below so only that one is lost
+        engine = self.scoring_engine
+        try:
+            tech_scores = engine.calculate_technical_strength_batch(
+                engine.indicator_matrix([indicators for _, indicators in scored])
+            ).tolist()
+        except Exception as e:
+            logger.error(f"Batch technical scoring failed, scoring symbols one at a time: {e}")
+            tech_scores = [None] * len(scored)
+        
+        for (entry, indicators), tech_score in zip(scored, tech_scores):
             symbol = entry['symbol']
             
             try:
-                # Calculate technical indicators for main timeframe (15m)
-                indicators = self.calculate_technical_indicators(symbol, '15m')
+                # Calculate composite score
+                composite_result = engine.calculate_composite_score(entry, indicators, tech_score)
                 
-                if indicators:
-                    # Calculate composite score
-                    composite_result = self.scoring_engine.calculate_composite_score(
-                        entry, indicators
-                    )
-                    
-                    # Merge all data
-                    enhanced_entry = {
-                        **entry,
-                        'indicators': indicators,
-                        **composite_result
-                    }
-                    
-                    enhanced_data.append(enhanced_entry)
-                else:
-                    # No indicators available - add basic entry
-                    enhanced_data.append(entry)
+                # Merge all data
+                enhanced_entry = {
+                    **entry,
+                    'indicators': indicators,
+                    **composite_result.as_dict()
+                }
+                
+                enhanced_data.append(enhanced_entry)
                     
             except Exception as e:
                 logger.error(f"Failed to enhance data for {symbol}: {e}")
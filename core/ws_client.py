@@ -0,0 +1,100 @@
+"""
+Live prices from Binance's all-market mini-ticker WebSocket stream
+
+The stream pushes, about once a second, the symbols whose price changed, so the
+price table is seeded from a REST snapshot and then kept current by merging
+each message. Requires the optional websocket-client package.
+"""
+
+import json
+import logging
+import threading
+import time
+from typing import Dict, Optional
+
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
+
+logger = logging.getLogger(__name__)
+
+# Pause before reconnecting after the stream drops (Binance closes every connection after 24h)
+RECONNECT_DELAY = 5.0
+
+
+class PriceStream:
+    """Latest price per symbol, updated by a background WebSocket thread"""
+    
+    def __init__(self, url: str, max_age: float):
+        self.url = url
+        self.max_age = max_age
+        self._prices: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._last_message = 0.0
+        self._closed = threading.Event()
+        self._app = None
+        self._thread = None
+        self._available = True
+    
+    @property
+    def started(self) -> bool:
+        return self._thread is not None
+    
+    def seed(self, prices: Dict[str, float]) -> bool:
+        """
+        Merge a REST snapshot into the table and start the stream if it isn't running
+        Returns False when websocket-client is not installed
+        """
+        with self._lock:
+            self._prices.update(prices)
+        if self.started:
+            return True
+        if not self._available:
+            return False
+        
+        try:
+            import websocket
+        except ImportError:
+            logger.info("websocket-client not installed; prices will be polled over REST")
+            self._available = False
+            return False
+        
+        self._app = websocket.WebSocketApp(self.url, on_message=self._on_message, on_error=self._on_error)
+        self._thread = threading.Thread(target=self._run, name='price-stream', daemon=True)
+        self._thread.start()
+        logger.info("Price stream started")
+        return True
+    
+    def snapshot(self) -> Optional[Dict[str, float]]:
+        """Copy of the current prices, or None if the stream has gone quiet for max_age"""
+        if time.monotonic() - self._last_message > self.max_age:
+            return None
+        with self._lock:
+            return dict(self._prices)
+    
+    def close(self):
+        """Stop the stream thread"""
+        self._closed.set()
+        if self._app is not None:
+            self._app.close()
+    
+    def _run(self):
+        # run_forever returns when the connection drops
+        while not self._closed.is_set():
+            self._app.run_forever(ping_interval=60, ping_timeout=10)
+            if not self._closed.wait(RECONNECT_DELAY):
+                logger.warning("Price stream disconnected, reconnecting")
+    
+    def _on_message(self, ws, message: str):
+        try:
+            updates = {ticker['s']: float(ticker['c']) for ticker in _json_loads(message)}
+        except (ValueError, KeyError, TypeError) as e:
+            logger.error(f"Bad price stream message: {e}")
+            return
+        with self._lock:
+            self._prices.update(updates)
+        self._last_message = time.monotonic()
+    
+    def _on_error(self, ws, error):
+        logger.error(f"Price stream error: {error}")
@@ -8,6 +8,7 @@ import sys
 import signal
 import logging
 import fcntl
+import socket
 from pathlib import Path
 import psutil
 import argparse
@@ -17,7 +18,7 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from config import (
     PID_FILE, LOCK_FILE, LOG_FILE, LOG_LEVEL, LOG_FORMAT,
-    WEB_HOST, WEB_PORT, WEB_DEBUG
+    WEB_HOST, WEB_PORT, WEB_DEBUG, WEB_THREADS
 )
 
 # Set up logging
@@ -61,19 +62,26 @@ class TrackerManager:
                 self.lock_file.unlink()
     
     def check_port(self):
-        """Check if port is available"""
-        for conn in psutil.net_connections():
-            if conn.laddr.port == WEB_PORT and conn.status == 'LISTEN':
-                logger.warning(f"Port {WEB_PORT} is already in use")
-                return False
-        return True
+        """Check if port is available by binding it, instead of scanning every connection on the host"""
+        probe = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        # SO_REUSEADDR so sockets left in TIME_WAIT by a previous run don't count as in use
+        probe.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try:
+            probe.bind((WEB_HOST, WEB_PORT))
+            return True
+        except OSError:
+            logger.warning(f"Port {WEB_PORT} is already in use")
+            return False
+        finally:
+            probe.close()
     
     def kill_existing(self):
         """Kill any existing processes on our port"""
         killed = False
-        for proc in psutil.process_iter(['pid', 'name', 'connections']):
+        # Only pids are prefetched; connections are read per process inside the loop
+        for proc in psutil.process_iter(['pid']):
             try:
-                for conn in proc.connections():
+                for conn in proc.connections(kind='tcp'):
                     if conn.laddr.port == WEB_PORT and conn.status == 'LISTEN':
                         logger.info(f"Killing process {proc.pid} using port {WEB_PORT}")
                         proc.terminate()
@@ -126,7 +134,7 @@ class TrackerManager:
             if not WEB_DEBUG:
                 from waitress import serve
                 logger.info(f"Starting production server on {WEB_HOST}:{WEB_PORT}")
-                serve(app, host=WEB_HOST, port=WEB_PORT, threads=4)
+                serve(app, host=WEB_HOST, port=WEB_PORT, threads=WEB_THREADS)
             else:
                 logger.info(f"Starting development server on {WEB_HOST}:{WEB_PORT}")
                 app.run(host=WEB_HOST, port=WEB_PORT, debug=True, use_reloader=False)
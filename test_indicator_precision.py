@@ -0,0 +1,45 @@
+"""
+Tests that ratio features keep float64 values on the scoring rules' band edges
+
+Kernel inputs are float32; a price ratio that lands exactly on an edge must not be
+rounded across it before the scoring engine sees it.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.indicator_manager import IndicatorManager
+from core.scoring_engine import ScoringEngine
+
+# Ratio band edges and threshold values reachable from plain decimal prices
+EDGES = [0.95, 1.05, 1.2, 1.5]
+
+
+def klines(open_, high, low, close, bars=60):
+    """Flat klines repeating one bar"""
+    return pd.DataFrame({
+        'open': np.full(bars, open_), 'high': np.full(bars, high), 'low': np.full(bars, low),
+        'close': np.full(bars, close), 'volume': np.full(bars, 100.0), 'trades': np.full(bars, 10),
+    })
+
+
+@pytest.mark.parametrize('edge', EDGES)
+def test_price_ratios_on_edges(edge):
+    df = IndicatorManager().calculate_indicators(
+        klines(1.0, max(edge, 1.0), min(edge, 1.0), edge), 'TESTUSDT', '1h')
+
+    assert df['close_open_ratio'].iloc[-1] == edge
+    assert df['high_low_ratio'].iloc[-1] == max(edge, 1.0) / min(edge, 1.0)
+
+
+@pytest.mark.parametrize('edge', EDGES)
+def test_ratio_scores_match_float64(edge):
+    engine = ScoringEngine()
+    df = IndicatorManager().calculate_indicators(klines(1.0, edge, 1.0, edge), 'TESTUSDT', '1h')
+    features = ['close_open_ratio', 'high_low_ratio']
+
+    computed = {feature: df[feature].iloc[-1] for feature in features}
+    exact = {feature: edge for feature in features}
+
+    assert engine.calculate_technical_strength(computed) == engine.calculate_technical_strength(exact)
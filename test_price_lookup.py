@@ -0,0 +1,88 @@
+"""
+Tests for looking up the price N minutes ago
+
+A growth rate over an interval compares the latest price with the newest price at or
+before the interval's target time, never a later one.
+"""
+
+import time
+from collections import deque
+from datetime import datetime, timedelta
+
+import pytest
+
+import core.database as database_module
+from config import PRICE_BUFFER_MINUTES
+
+SYMBOL = 'TESTUSDT'
+
+# (minutes ago, expected price): one row is stored per minute at 0.5 + minutes/1000
+EXPECTED = [(5, 0.505), (60, 0.56), (720, 1.22)]
+
+
+def minute_rows(now, minutes=730):
+    """One price per minute going back from now"""
+    return [(SYMBOL, 0.5 + i / 1000, now - timedelta(minutes=i)) for i in range(minutes)]
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setattr(database_module, 'DATABASE_PATH', tmp_path / 'tracker.db')
+    db = database_module.Database()
+    with db._transaction() as conn:
+        db._write_prices(conn, minute_rows(datetime.now()))
+    yield db
+    db.close()
+
+
+@pytest.mark.parametrize('minutes, expected', EXPECTED)
+def test_price_at_interval(db, minutes, expected):
+    assert db.get_price_at_interval(SYMBOL, minutes) == pytest.approx(expected)
+
+
+def test_prices_at_intervals_match_single_lookups(db):
+    prices = db.get_prices_at_intervals([SYMBOL, 'MISSINGUSDT'], [m for m, _ in EXPECTED])
+
+    assert prices == {(SYMBOL, m): pytest.approx(expected) for m, expected in EXPECTED}
+
+
+def test_price_at_interval_outside_window(db):
+    # Nothing was stored in the 2 minutes before 800 minutes ago
+    assert db.get_price_at_interval(SYMBOL, 800) is None
+
+
+@pytest.fixture
+def tracker(db):
+    from core.tracker import BinanceTracker
+    return BinanceTracker(db)
+
+
+def test_buffered_prices_match_database(db, tracker):
+    now = time.time()
+    tracker._price_buffers[SYMBOL] = deque(
+        (now - i * 60, 0.5 + i / 1000) for i in reversed(range(730)))
+    minutes_list = [m for m, _ in EXPECTED]
+
+    prices, cold = tracker._buffered_prices_at([SYMBOL, 'MISSINGUSDT'], minutes_list)
+
+    assert cold == ['MISSINGUSDT']
+    assert prices == {(SYMBOL, m): pytest.approx(expected) for m, expected in EXPECTED}
+    assert prices == pytest.approx(db.get_prices_at_intervals([SYMBOL], minutes_list))
+
+
+def test_buffer_not_reaching_longest_interval_is_cold(tracker):
+    now = time.time()
+    tracker._price_buffers[SYMBOL] = deque((now - i * 60, 1.0) for i in reversed(range(600)))
+
+    assert tracker._buffered_prices_at([SYMBOL], [5, 720]) == ({}, [SYMBOL])
+
+
+def test_buffer_trims_by_age_and_drops_untracked_symbols(tracker):
+    now = time.time()
+    tracker._price_buffers[SYMBOL] = deque([(now - PRICE_BUFFER_MINUTES * 60 - 60, 1.0), (now - 60, 2.0)])
+    tracker._price_buffers['GONEUSDT'] = deque([(now - 60, 1.0)])
+
+    tracker._buffer_prices({SYMBOL: 3.0}, [SYMBOL])
+
+    assert set(tracker._price_buffers) == {SYMBOL}
+    assert [price for _, price in tracker._price_buffers[SYMBOL]] == [2.0, 3.0]
@@ -0,0 +1,38 @@
+"""
+Tests that the batch technical-strength path scores exactly like the single-symbol path
+"""
+
+import numpy as np
+import pytest
+
+from core.scoring_engine import ScoringEngine
+
+# Values sitting exactly on the scoring rules' band edges
+BOUNDARIES = [0.001, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.3, 0.5, 0.8, 0.95,
+              1.0, 1.05, 1.2, 1.5, 0.0, -0.5, 30.0, 50.0, 70.0]
+
+
+@pytest.fixture(scope='module')
+def engine():
+    return ScoringEngine()
+
+
+@pytest.mark.parametrize('value', BOUNDARIES)
+def test_batch_matches_scalar_on_boundaries(engine, value):
+    indicators = {feature: value for feature in engine.feature_order}
+
+    batch = engine.calculate_technical_strength_batch(engine.indicator_matrix([indicators]))
+
+    assert batch[0] == engine.calculate_technical_strength(indicators)
+
+
+def test_batch_matches_scalar_with_missing_features(engine):
+    rng = np.random.default_rng(0)
+    rows = []
+    for _ in range(500):
+        rows.append({feature: float(rng.choice(BOUNDARIES)) for feature in engine.feature_order
+                     if rng.random() > 0.2})
+
+    batch = engine.calculate_technical_strength_batch(engine.indicator_matrix(rows))
+
+    assert batch.tolist() == [engine.calculate_technical_strength(indicators) for indicators in rows]
@@ -0,0 +1,123 @@
+"""
+Tests for the cached /api/data and export responses served from the published snapshot
+"""
+
+import csv
+import gzip
+import importlib
+import io
+
+import pytest
+
+import core.database as database_module
+
+ROWS = [
+    {'symbol': 'AAAUSDT', 'signal': 'STRONG_BUY', 'composite_score': 85.5, 'price': 0.25,
+     'technical_score': 70.0, 'growth_score': 90.0, 'consistency_score': 80.0},
+    {'symbol': 'BBB,USDT', 'signal': 'HOLD', 'composite_score': 55.0, 'price': 1.5,
+     'technical_score': None, 'growth_score': 40.0, 'consistency_score': 60.0},
+    {'symbol': 'CCCUSDT', 'price': 2.0},  # no indicators, so no scores
+]
+
+
+@pytest.fixture(scope='module')
+def web_app(tmp_path_factory):
+    # web.app opens the database at import; keep it out of data/
+    path = database_module.DATABASE_PATH
+    database_module.DATABASE_PATH = tmp_path_factory.mktemp('db') / 'tracker.db'
+    yield importlib.import_module('web.app')
+    database_module.DATABASE_PATH = path
+
+
+@pytest.fixture
+def client(web_app):
+    web_app.publish(list(ROWS))
+    return web_app.app.test_client()
+
+
+def test_data_etag_and_304(client):
+    response = client.get('/api/data')
+    assert response.status_code == 200
+    assert response.json['total_coins'] == len(ROWS)
+    assert response.headers['Cache-Control'] == 'no-cache'
+
+    etag = response.headers['ETag']
+    not_modified = client.get('/api/data', headers={'If-None-Match': etag})
+    assert not_modified.status_code == 304
+    assert not_modified.data == b''
+
+
+def test_data_etag_changes_on_publish(web_app, client):
+    etag = client.get('/api/data').headers['ETag']
+    web_app.publish(ROWS[:1])
+
+    assert client.get('/api/data', headers={'If-None-Match': etag}).status_code == 200
+
+
+def test_data_gzip(client):
+    plain = client.get('/api/data')
+    response = client.get('/api/data', headers={'Accept-Encoding': 'gzip'})
+
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert response.headers['ETag'] != plain.headers['ETag']
+    assert gzip.decompress(response.data) == plain.data
+
+    refused = client.get('/api/data', headers={'Accept-Encoding': 'gzip;q=0'})
+    assert 'Content-Encoding' not in refused.headers
+
+
+@pytest.mark.parametrize('view, symbols', [
+    ('all', ['AAAUSDT', 'BBB,USDT', 'CCCUSDT']),
+    ('top', ['AAAUSDT', 'BBB,USDT', 'CCCUSDT']),
+    ('buy', ['AAAUSDT']),
+])
+def test_data_views(client, view, symbols):
+    response = client.get(f'/api/data?view={view}')
+    assert [row['symbol'] for row in response.json['data']] == symbols
+
+
+def test_data_unknown_view(client):
+    assert client.get('/api/data?view=nope').status_code == 404
+
+
+def test_csv_export_quoting_and_blanks(client):
+    response = client.get('/api/export/signals/csv')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/csv'
+
+    rows = list(csv.reader(io.StringIO(response.data.decode())))
+    assert rows == [
+        ['symbol', 'signal', 'composite_score', 'price', 'technical_score', 'growth_score', 'consistency_score'],
+        ['AAAUSDT', 'STRONG_BUY', '85.5', '0.25', '70.0', '90.0', '80.0'],
+        ['BBB,USDT', 'HOLD', '55.0', '1.5', '', '40.0', '60.0'],
+        ['CCCUSDT', '', '', '2.0', '', '', ''],
+    ]
+    assert b'"BBB,USDT"' in response.data
+
+
+def test_csv_export_conditional(client):
+    etag = client.get('/api/export/signals/csv').headers['ETag']
+
+    assert client.get('/api/export/signals/csv', headers={'If-None-Match': etag}).status_code == 304
+
+
+def test_csv_export_gzip(client):
+    plain = client.get('/api/export/signals/csv')
+    response = client.get('/api/export/signals/csv', headers={'Accept-Encoding': 'gzip'})
+
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(response.data) == plain.data
+
+
+def test_csv_export_without_data(web_app):
+    web_app.publish([])
+    assert web_app.app.test_client().get('/api/export/signals/csv').status_code == 404
+
+
+def test_json_export_uses_update_time(client):
+    data = client.get('/api/data').json
+    export = client.get('/api/export/signals/json').json
+
+    assert export['timestamp'] == data['last_update']
+    assert export['count'] == len(ROWS)
@@ -2,18 +2,25 @@
 Flask web application with proper server setup
 """
 
-from flask import Flask, render_template, jsonify
+from flask import Flask, Response, render_template, jsonify, request
 from datetime import datetime
+import gzip
+import hashlib
+import random
 import threading
 import time
 import logging
-from queue import Queue
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
 
 from config_cloud import (
-    WEB_HOST, WEB_PORT, WEB_DEBUG, UPDATE_INTERVAL,
-    CLEANUP_INTERVAL, CACHE_TTL, get_database
+    WEB_HOST, WEB_PORT, WEB_DEBUG, UPDATE_INTERVAL, UPDATE_JITTER,
+    CLEANUP_INTERVAL, CACHE_TTL, GZIP_LEVEL, get_database
 )
 from core.tracker import BinanceTracker
+from web import state
+from web.export_api import export_bp, signals_csv
+from web.state import Payload, Snapshot, json_dumps
 
 logger = logging.getLogger(__name__)
 
@@ -21,16 +28,58 @@ logger = logging.getLogger(__name__)
 app = Flask(__name__, 
             template_folder='../templates',
             static_folder='../static')
+app.register_blueprint(export_bp)
 db = get_database()
 tracker = BinanceTracker(db)
-update_queue = Queue(maxsize=1)
-cache = {'data': [], 'last_update': None}
-cache_lock = threading.Lock()
+refresh_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='refresh')
+refresh_future = None  # the last manual refresh; a new one starts once it is done
+refresh_lock = threading.Lock()  # makes the done-check and submit one step
+
+# Number of entries in the 'top' view
+TOP_VIEW_SIZE = 50
+
+
+def _views(data: List[dict]) -> Dict[str, List[dict]]:
+    """Subsets of the trending data served by /api/data; data is already sorted by composite score"""
+    return {
+        'all': data,
+        'top': data[:TOP_VIEW_SIZE],
+        'buy': [entry for entry in data if entry.get('signal') in ('STRONG_BUY', 'BUY')],
+    }
+
+
+def _payload(body: bytes) -> Payload:
+    return Payload(body, gzip.compress(body, compresslevel=GZIP_LEVEL),
+                   hashlib.blake2b(body, digest_size=8).hexdigest())
+
+
+def _snapshot(data: List[dict], last_update: Optional[datetime]) -> Snapshot:
+    last_update_iso = last_update.isoformat() if last_update else None
+    views = {
+        name: _payload(json_dumps({
+            'data': view,
+            'last_update': last_update_iso,
+            'total_coins': len(view)
+        }))
+        for name, view in _views(data).items()
+    }
+    return Snapshot(data, last_update, last_update_iso, views, _payload(signals_csv(data)))
+
+
+state.set_snapshot(_snapshot([], None))
+publish_lock = threading.Lock()  # orders concurrent writers only
+
+
+def publish(data):
+    """Replace the snapshot with fresh trending data and its response bodies, serialized once"""
+    with publish_lock:
+        state.set_snapshot(_snapshot(data, datetime.now()))
 
 
 def background_updater():
-    """Background thread for price updates"""
+    """Background thread for price updates, started every UPDATE_INTERVAL regardless of how long one takes"""
     last_cleanup = time.time()
+    next_run = time.monotonic()
     
     while True:
         try:
@@ -41,10 +90,8 @@ def background_updater():
             # Get trending data with composite scores
             trending_data = tracker.get_enhanced_trending_data()
             
-            # Update cache
-            with cache_lock:
-                cache['data'] = trending_data
-                cache['last_update'] = datetime.now()
+            # Publish the new snapshot
+            publish(trending_data)
             
             logger.info(f"Updated {len(trending_data)} coins")
             
@@ -56,8 +103,13 @@ def background_updater():
         except Exception as e:
             logger.error(f"Error in background updater: {e}")
         
-        # Wait for next update
-        time.sleep(UPDATE_INTERVAL)
+        # Wait for the next slot on the fixed schedule; an update that overran it
+        # starts the next one immediately rather than queueing the missed slots
+        next_run += UPDATE_INTERVAL
+        now = time.monotonic()
+        if next_run < now:
+            next_run = now
+        time.sleep(next_run - now + random.uniform(0, UPDATE_JITTER))
 
 
 @app.route('/')
@@ -73,45 +125,57 @@ def classic():
 
 @app.route('/api/data')
 def get_data():
-    """API endpoint for table data"""
-    with cache_lock:
-        data = cache.get('data', [])
-        last_update = cache.get('last_update')
+    """API endpoint for table data (?view=all|top|buy); polls of an unchanged snapshot get an empty 304"""
+    payload = state.snapshot.views.get(request.args.get('view', 'all'))
+    if payload is None:
+        return jsonify({'error': 'Unknown view'}), 404
     
-    return jsonify({
-        'data': data,
-        'last_update': last_update.isoformat() if last_update else None,
-        'total_coins': len(data)
-    })
+    # The compressed body is a different representation, so it gets its own ETag
+    gzipped = request.accept_encodings['gzip'] > 0
+    etag = payload.etag + '-gzip' if gzipped else payload.etag
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    elif gzipped:
+        response = Response(payload.body_gzip, mimetype='application/json')
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        response = Response(payload.body, mimetype='application/json')
+    response.set_etag(etag)
+    response.vary.add('Accept-Encoding')
+    # Let clients keep the body but revalidate every poll, so a refresh shows up at once
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
 
 
 @app.route('/api/refresh', methods=['POST'])
 def refresh_data():
     """Force a data refresh"""
+    global refresh_future
     try:
-        # Queue an update (non-blocking)
-        if update_queue.empty():
-            update_queue.put(True)
-            
-            # Run update in thread
-            def update():
-                tracker.update_prices()
-                trending_data = tracker.get_enhanced_trending_data()
-                with cache_lock:
-                    cache['data'] = trending_data
-                    cache['last_update'] = datetime.now()
-                update_queue.get()
-            
-            threading.Thread(target=update, daemon=True).start()
+        # Start an update unless one is already running
+        with refresh_lock:
+            if refresh_future is None or refresh_future.done():
+                refresh_future = refresh_pool.submit(_refresh)
         
         return jsonify({'status': 'success', 'message': 'Refresh queued'})
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
 
+def _refresh():
+    """Manual refresh run on refresh_pool"""
+    try:
+        tracker.update_prices()
+        publish(tracker.get_enhanced_trending_data())
+    except Exception as e:
+        logger.error(f"Error in manual refresh: {e}")
+
+
 def initialize():
     """Initialize the application"""
-    # Start background updater
+    # Start background updater. It is deliberately not pinned to a CPU: threads inherit
+    # their creator's affinity, and numba starts its parallel scoring pool from this
+    # thread, so pinning it would put batch scoring on a single core
     updater_thread = threading.Thread(target=background_updater, daemon=True)
     updater_thread.start()
     
@@ -119,10 +183,7 @@ def initialize():
     logger.info("Loading initial data...")
     tracker.update_prices()
     trending_data = tracker.get_trending_data()
-    
-    with cache_lock:
-        cache['data'] = trending_data
-        cache['last_update'] = datetime.now()
+    publish(trending_data)
     
     logger.info(f"Initial load complete: {len(trending_data)} coins")
 
@@ -2,60 +2,74 @@
 API endpoints for data export
 """
 
-from flask import Blueprint, jsonify, send_file
-import pandas as pd
+from flask import Blueprint, Response, jsonify, request, send_file
+import csv
 import io
-from datetime import datetime
+from typing import List
+
+from web import state
+from web.state import json_dumps
 
 export_bp = Blueprint('export', __name__)
 
+# Columns of the signals CSV, in order; entries without indicators have no scores and leave them blank
+SIGNAL_COLUMNS = ('symbol', 'signal', 'composite_score', 'price',
+                  'technical_score', 'growth_score', 'consistency_score')
+
+
+def signals_csv(data: List[dict]) -> bytes:
+    """
+    The signals CSV for one snapshot; built once per update, not per export
+    csv.writer is kept over a generated f-string row formatter: that saves ~0.7 ms on
+    500 rows only when every key is present, before blanks for None and quoting
+    """
+    output = io.StringIO()
+    writer = csv.writer(output, lineterminator='\n')
+    writer.writerow(SIGNAL_COLUMNS)
+    # Split the fields out column-wise first: one pass per column instead of seven dict lookups per row
+    columns = [[row.get(column, '') for row in data] for column in SIGNAL_COLUMNS]
+    writer.writerows(zip(*columns))
+    return output.getvalue().encode()
+
+
 @export_bp.route('/api/export/signals/csv')
 def export_signals_csv():
     """Export current signals as CSV"""
-    from web.app import cache, cache_lock
-    
-    with cache_lock:
-        data = cache.get('data', [])
+    current = state.snapshot
     
-    if not data:
+    if not current.data:
         return jsonify({'error': 'No data available'}), 404
     
-    # Convert to DataFrame
-    df = pd.DataFrame(data)
+    # The compressed body is a different representation, so it gets its own ETag
+    payload = current.csv
+    gzipped = request.accept_encodings['gzip'] > 0
+    body, etag = (payload.body_gzip, payload.etag + '-gzip') if gzipped else (payload.body, payload.etag)
     
-    # Select relevant columns
-    columns = ['symbol', 'signal', 'composite_score', 'price', 
-               'technical_score', 'growth_score', 'consistency_score']
-    df = df[columns]
-    
-    # Create CSV
-    output = io.StringIO()
-    df.to_csv(output, index=False)
-    output.seek(0)
-    
-    # Convert to bytes
-    output_bytes = io.BytesIO(output.getvalue().encode())
-    output_bytes.seek(0)
-    
-    filename = f"binance_signals_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-    
-    return send_file(
-        output_bytes,
+    # conditional=True answers If-None-Match/If-Modified-Since and Range from the prebuilt bytes
+    filename = f"binance_signals_{current.last_update.strftime('%Y%m%d_%H%M%S')}.csv"
+    response = send_file(
+        io.BytesIO(body),
         mimetype='text/csv',
         as_attachment=True,
-        download_name=filename
+        download_name=filename,
+        conditional=True,
+        etag=etag,
+        last_modified=current.last_update.timestamp()
     )
+    if gzipped:
+        response.headers['Content-Encoding'] = 'gzip'
+    response.vary.add('Accept-Encoding')
+    return response
 
 @export_bp.route('/api/export/signals/json')
 def export_signals_json():
     """Export current signals as JSON"""
-    from web.app import cache, cache_lock
-    
-    with cache_lock:
-        data = cache.get('data', [])
+    current = state.snapshot
+    data = current.data
     
-    return jsonify({
-        'timestamp': datetime.now().isoformat(),
+    # Stamped with the update the signals came from, not the time of the request
+    return Response(json_dumps({
+        'timestamp': current.last_update_iso,
         'count': len(data),
         'signals': data
-    })
\ No newline at end of file
+    }), mimetype='application/json')
\ No newline at end of file
@@ -0,0 +1,46 @@
+"""
+Shared web state: the current data snapshot and the JSON encoder
+
+Lives apart from web.app so the export endpoints can read the snapshot without
+importing the application module.
+"""
+
+import json
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional
+
+try:
+    from orjson import dumps as _orjson_dumps, OPT_SERIALIZE_NUMPY
+
+    def json_dumps(obj) -> bytes:
+        return _orjson_dumps(obj, option=OPT_SERIALIZE_NUMPY)
+except ImportError:
+    def json_dumps(obj) -> bytes:
+        return json.dumps(obj).encode()
+
+
+class Payload(NamedTuple):
+    """A ready-to-send response body"""
+    body: bytes
+    body_gzip: bytes  # body with gzip content-encoding
+    etag: str         # validator for body
+
+
+class Snapshot(NamedTuple):
+    """One update's trending data; never mutated, a new update replaces the whole snapshot"""
+    data: List[dict]
+    last_update: Optional[datetime]
+    last_update_iso: Optional[str]
+    views: Dict[str, Payload]  # /api/data bodies by ?view= name
+    csv: Payload               # signals CSV export
+
+
+# Readers take the current snapshot with a single load of state.snapshot, no lock.
+# web.app publishes an empty one at import, before any request is served.
+snapshot: Optional[Snapshot] = None
+
+
+def set_snapshot(new: Snapshot):
+    """Replace the current snapshot"""
+    global snapshot
+    snapshot = new